@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class CharacterViewerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -7,4 +8,6 @@ class CharacterViewerConfig(AppConfig):
     def ready(self):
         # No initialization needed for temporary media cleanup
         # We're using simple temporary directories now
-        pass
\ No newline at end of file
+        from .search import restore_search_index
+
+        post_migrate.connect(restore_search_index, sender=self)
\ No newline at end of file
@@ -0,0 +1,702 @@
+"""
+Benchmark scenarios for the character viewer.
+
+Each scenario yields one result dict per measurement; scenarios that touch
+the database run against a throwaway test database (in-memory SQLite with the
+default settings). Run them with ``python manage.py benchmark <scenario>``.
+"""
+import gzip
+import json
+import os
+import posixpath
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from mudae_project.cache import cache_config
+
+from .export import EXPORT_FIELDS, EXPORT_FORMATS, encode_chunks, iter_export_characters
+from .fragments import attach_cards
+from .importer import import_characters
+from .leaderboard import METRICS, rank_of, rebuild_trees, top_collections
+from .listing import SORT_ORDERINGS, character_queryset, paginate_characters
+from .models import Character, CollectionStats
+from .pagination import encode_cursor, paginate
+from .parsers import iter_json_characters, iter_mudae_characters
+from .search import search_characters, search_rank
+
+KEY_TYPES = ('bronze', 'silver', 'gold', 'chaos')
+
+# Raw Discord paste of a real ``$mm`` harem list, used as benchmark input.
+MUDAE_FIXTURE = settings.BASE_DIR / 'characters.txt'
+
+
+@contextmanager
+def scratch_database():
+    """Create a migrated test database for the duration of the block."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def synthetic_rows(count, start=0):
+    """Yield ``count`` characters shaped like an uploaded JSON export."""
+    for i in range(start, start + count):
+        keys = i % 5
+        yield {
+            'rank': f"#{i + 1:,}",
+            'name': f"Character {i}",
+            'series': f"Series {i % 997}",
+            'value': f"{(i * 37) % 1500 + 30:,} ka",
+            'note': '',
+            'image': f"https://mudae.net/uploads/{i}/image{i}.png",
+            'keys': keys,
+            'key_type': KEY_TYPES[i % 4] if keys else '',
+        }
+
+
+def write_synthetic_export(fileobj, min_bytes):
+    """
+    Write a JSON export of at least ``min_bytes`` to ``fileobj`` without
+    building it in memory. The same block of rows is repeated to keep this
+    fast; returns the number of characters written.
+    """
+    batch = 1000
+    block = ','.join(json.dumps(row) for row in synthetic_rows(batch)).encode('utf-8')
+    fileobj.write(b'{"user": "bench", "characters": [')
+    fileobj.write(block)
+    written = len(block)
+    count = batch
+    while written < min_bytes:
+        fileobj.write(b',')
+        fileobj.write(block)
+        written += len(block) + 1
+        count += batch
+    fileobj.write(b']}')
+    return count
+
+
+def iter_file_chunks(fileobj, chunk_size=64 * 1024):
+    """Yield ``fileobj`` in ``chunk_size`` byte chunks, like UploadedFile.chunks()."""
+    fileobj.seek(0)
+    while True:
+        data = fileobj.read(chunk_size)
+        if not data:
+            return
+        yield data
+
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def _import_per_row(user, rows):
+    """The pre-bulk upload path: one autocommitted INSERT per character."""
+    Character.objects.filter(user=user).delete()
+    for sort_order, char_data in enumerate(rows):
+        Character.objects.create(
+            user=user,
+            rank=char_data.get('rank', ''),
+            name=char_data.get('name', ''),
+            series=char_data.get('series', ''),
+            value=char_data.get('value', ''),
+            note=char_data.get('note', ''),
+            image=char_data.get('image', ''),
+            sort_order=sort_order,
+            in_trade_list=False,
+            keys=char_data.get('keys', 0),
+            key_type=char_data.get('key_type', ''),
+        )
+
+
+def _import_bulk_replace(user, rows):
+    """Bulk import into an emptied collection, as a first upload would."""
+    Character.objects.filter(user=user).delete()
+    import_characters(user, rows)
+
+
+def bench_import(sizes=(1000, 10000, 50000)):
+    """Compare the per-row create() path with the bulk import engine."""
+    with scratch_database():
+        user = User.objects.create_user('bench')
+        for size in sizes:
+            rows = list(synthetic_rows(size))
+            for label, func in (('per-row', _import_per_row), ('bulk', _import_bulk_replace)):
+                elapsed = _timed(func, user, rows)
+                yield {
+                    'rows': size,
+                    'path': label,
+                    'seconds': round(elapsed, 3),
+                    'rows/sec': round(size / elapsed),
+                }
+
+
+def bench_reimport(sizes=(10000, 50000), changed=0.01):
+    """Re-uploading with a few changes: full replace vs diff vs identical file."""
+    with scratch_database():
+        user = User.objects.create_user('bench')
+        for size in sizes:
+            rows = list(synthetic_rows(size))
+            edited = [dict(row) for row in rows]
+            for row in edited[::max(1, int(1 / changed))]:
+                row['value'] = '1 ka'
+
+            _import_bulk_replace(user, rows)
+            replace = _timed(_import_bulk_replace, user, edited)
+            import_characters(user, rows, content_hash='original')
+            diff = _timed(import_characters, user, edited, content_hash='edited')
+            same = _timed(import_characters, user, edited, content_hash='edited')
+            for label, elapsed in (('replace', replace), ('diff', diff), ('identical', same)):
+                yield {
+                    'rows': size,
+                    'changed': f'{changed:.0%}',
+                    'path': label,
+                    'seconds': round(elapsed, 3),
+                }
+
+
+# The pre-typed-column sort expressions, kept for before/after comparisons.
+LEGACY_SORTS = {
+    'rank': ({'rank_numeric': "CAST(REPLACE(REPLACE(rank, '#', ''), ',', '') AS INTEGER)"}, 'rank_numeric'),
+    'kakera': ({'kakera_value': "CAST(REPLACE(value, ' ka', '') AS INTEGER)"}, '-kakera_value'),
+}
+
+
+def _first_page_latency(queryset, repeat):
+    """Best-of-``repeat`` time to fetch the first 10 rows of ``queryset``."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset[:10])
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_sort(sizes=(50000,), users=3, repeat=5):
+    """First-page latency of rank/kakera sorts: CAST/REPLACE strings vs typed columns."""
+    with scratch_database():
+        for size in sizes:
+            owners = [User.objects.create_user(f'bench{size}-{i}') for i in range(users)]
+            for owner in owners:
+                import_characters(owner, synthetic_rows(size))
+            user = owners[0]
+            for sort_by, (select, ordering) in LEGACY_SORTS.items():
+                legacy = Character.objects.filter(user=user).extra(select=select).order_by(ordering)
+                typed = character_queryset(user, sort_by=sort_by)
+                for label, queryset in (('cast', legacy), ('typed', typed)):
+                    yield {
+                        'rows/user': size,
+                        'sort': sort_by,
+                        'query': label,
+                        'ms': round(_first_page_latency(queryset, repeat) * 1000, 2),
+                    }
+
+
+def _best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_paginate(sizes=(50000,), depths=(1, 100, 1000, 2500), repeat=5, sort_by='kakera', page_size=10):
+    """
+    Page latency by depth: OFFSET Paginator vs a cursor seek to the same page.
+    Depths past a size's last page are measured at the last page.
+    """
+    with scratch_database():
+        user = User.objects.create_user('bench')
+        ordering = SORT_ORDERINGS[sort_by]
+        column = ordering[0].lstrip('-')
+        for size in sizes:
+            import_characters(user, synthetic_rows(size))
+            queryset = character_queryset(user, sort_by=sort_by)
+            last_page = max(1, -(-size // page_size))
+            for depth in sorted({min(depth, last_page) for depth in depths}):
+                boundary = queryset[(depth - 1) * page_size - 1] if depth > 1 else None
+
+                def offset_page():
+                    paginator = Paginator(queryset, page_size)
+                    list(paginator.get_page(depth))
+                    queryset.count()  # the old view counted a second time
+
+                def cursor_page():
+                    cursor = encode_cursor(sort_by, depth, [getattr(boundary, column), boundary.id], False) if boundary else None
+                    list(paginate(queryset, ordering, page_size, cursor=cursor, key=sort_by))
+
+                for label, func in (('offset', offset_page), ('cursor', cursor_page)):
+                    yield {
+                        'rows': size,
+                        'page': depth,
+                        'mode': label,
+                        'ms': round(_best_of(func, repeat) * 1000, 2),
+                    }
+
+
+# Search terms by selectivity for the first user: one character, one
+# series, every character.
+SEARCH_TERMS = ('Character 4321', 'Series 42', 'Char')
+
+
+def bench_search(sizes=(1000000,), users=100, repeat=5):
+    """
+    First search page latency (count and rows, as the list view runs them)
+    with ``sizes`` rows spread over ``users`` users: LIKE scan vs the index.
+    """
+    with scratch_database():
+        for size in sizes:
+            owners = [User.objects.create_user(f'bench{size}-{i}') for i in range(users)]
+            for n, owner in enumerate(owners):
+                import_characters(owner, synthetic_rows(size // users, start=n * (size // users)))
+            user = owners[0]
+            for term in SEARCH_TERMS:
+                scan = (Character.objects.filter(user=user)
+                        .filter(Q(name__icontains=term) | Q(series__icontains=term))
+                        .annotate(search_rank=search_rank(term)))
+                indexed = search_characters(Character.objects.filter(user=user), user, term)
+                for label, queryset in (('like', scan), ('index', indexed)):
+                    queryset = queryset.order_by(*SORT_ORDERINGS['relevance'])
+
+                    def search_page(queryset=queryset, term=term):
+                        return paginate(queryset, SORT_ORDERINGS['relevance'], 10, key=term)
+
+                    yield {
+                        'rows': size,
+                        'users': users,
+                        'search': term,
+                        'matches': search_page().count,
+                        'query': label,
+                        'ms': round(_best_of(lambda: list(search_page()), repeat) * 1000, 2),
+                    }
+
+
+def _export_materialized(queryset, export_format):
+    """The naive export: every row loaded, then the whole body built at once."""
+    characters = list(queryset.all())
+    if export_format == 'json':
+        rows = [{field: getattr(c, field) for field in EXPORT_FIELDS} for c in characters]
+        yield json.dumps({'characters': rows}, ensure_ascii=False).encode('utf-8')
+    else:
+        yield ''.join(EXPORT_FORMATS[export_format][1](characters)).encode('utf-8')
+
+
+def _export_streaming(queryset, export_format):
+    characters = iter_export_characters(queryset, SORT_ORDERINGS['default'])
+    return encode_chunks(EXPORT_FORMATS[export_format][1](characters))
+
+
+def bench_export(sizes=(100000,), formats=('csv', 'json', 'txt')):
+    """Time to first byte, total time and peak memory of an export: materialized vs streamed."""
+    with scratch_database():
+        for size in sizes:
+            user = User.objects.create_user(f'bench{size}')
+            import_characters(user, synthetic_rows(size))
+            queryset = character_queryset(user)
+            for export_format in formats:
+                for label, export in (('materialized', _export_materialized), ('streaming', _export_streaming)):
+                    started = time.perf_counter()
+                    chunks = export(queryset, export_format)
+                    total = len(next(chunks))
+                    first_byte = time.perf_counter() - started
+                    total += sum(len(chunk) for chunk in chunks)
+                    elapsed = time.perf_counter() - started
+                    # Memory is measured on a second run: tracing slows the
+                    # many small allocations of either export several-fold
+                    tracemalloc.start()
+                    for _ in export(queryset, export_format):
+                        pass
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    yield {
+                        'rows': size,
+                        'format': export_format,
+                        'export': label,
+                        'first_byte_ms': round(first_byte * 1000, 1),
+                        'seconds': round(elapsed, 3),
+                        'megabytes': round(total / (1024 * 1024), 1),
+                        'peak_mb': round(peak / (1024 * 1024), 1),
+                    }
+
+
+def bench_leaderboard(sizes=(10000, 100000), repeat=20):
+    """
+    Leaderboard lookups over ``sizes`` ranked collections: top 50 from the
+    index, and a rank by COUNT of higher scores vs the Fenwick tree.
+    """
+    with scratch_database():
+        for size in sizes:
+            CollectionStats.objects.all().delete()
+            User.objects.all().delete()
+            User.objects.bulk_create([User(username=f'bench{i}') for i in range(size)], batch_size=5000)
+            CollectionStats.objects.bulk_create([
+                CollectionStats(user=user, characters=i % 3000 + 1, total_kakera=(i * 7919) % 5000000,
+                                total_keys=i % 700)
+                for i, user in enumerate(User.objects.order_by('id'))
+            ], batch_size=5000)
+            rebuild_trees()
+            for metric, field in METRICS.items():
+                # The median collection, so the count scans half of them
+                score = (CollectionStats.objects.order_by(field).values_list(field, flat=True)[size // 2])
+                ranked = CollectionStats.objects.filter(characters__gt=0)
+                lookups = (
+                    ('top-50', lambda: top_collections(metric)),
+                    ('rank-count', lambda: ranked.filter(**{f'{field}__gt': score}).count() + 1),
+                    ('rank-tree', lambda: rank_of(metric, score)),
+                )
+                for label, lookup in lookups:
+                    yield {
+                        'collections': size,
+                        'metric': metric,
+                        'lookup': label,
+                        'ms': round(_best_of(lookup, repeat) * 1000, 3),
+                    }
+
+
+def _parse_json_loads(fileobj):
+    return len(json.loads(fileobj.read().decode('utf-8'))['characters'])
+
+
+def _parse_streaming(fileobj):
+    return sum(1 for _ in iter_json_characters(iter_file_chunks(fileobj)))
+
+
+def bench_parse(sizes=(10, 50, 100)):
+    """Compare peak memory and throughput of json.loads and the streaming parser (sizes in MB)."""
+    for size in sizes:
+        with tempfile.TemporaryFile() as fileobj:
+            count = write_synthetic_export(fileobj, size * 1024 * 1024)
+            for label, func in (('json.loads', _parse_json_loads), ('streaming', _parse_streaming)):
+                fileobj.seek(0)
+                tracemalloc.start()
+                started = time.perf_counter()
+                parsed = func(fileobj)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                assert parsed == count
+                yield {
+                    'megabytes': size,
+                    'rows': count,
+                    'parser': label,
+                    'seconds': round(elapsed, 3),
+                    'peak_mb': round(peak / (1024 * 1024), 1),
+                }
+
+
+def mudae_fixture_lines(count):
+    """Return ``count`` lines of $mm text built by repeating the fixture."""
+    lines = MUDAE_FIXTURE.read_text(encoding='utf-8').splitlines()
+    repeats = -(-count // len(lines))
+    return (lines * repeats)[:count]
+
+
+def bench_parse_text(sizes=(10000, 100000, 1000000)):
+    """Measure the $mm text parser over the characters.txt fixture (sizes in lines)."""
+    for size in sizes:
+        data = '\n'.join(mudae_fixture_lines(size)).encode('utf-8')
+        chunks = [data[i:i + 64 * 1024] for i in range(0, len(data), 64 * 1024)]
+        started = time.perf_counter()
+        parsed = sum(1 for _ in iter_mudae_characters(chunks))
+        elapsed = time.perf_counter() - started
+        yield {
+            'lines': size,
+            'characters': parsed,
+            'seconds': round(elapsed, 3),
+            'lines/sec': round(size / elapsed),
+        }
+
+
+def _handler_event(path, params, cookies, accept_encoding):
+    return {
+        'httpMethod': 'GET',
+        'path': path,
+        'queryStringParameters': params,
+        'headers': {
+            'host': 'localhost',
+            'x-forwarded-proto': 'https',
+            'cookie': '; '.join(f'{name}={morsel.value}' for name, morsel in cookies.items()),
+            'accept-encoding': accept_encoding,
+        },
+    }
+
+
+def bench_handler(sizes=(1000,), repeat=5):
+    """Vercel handler overhead and payload size for a page of ``size`` API rows."""
+    import vercel_handler
+
+    application = vercel_handler.get_application()
+    with scratch_database(), override_settings(CHARACTER_API_MAX_PAGE_SIZE=max(sizes)):
+        user = User.objects.create_user('bench')
+        client = Client()
+        client.force_login(user)
+        for size in sizes:
+            import_characters(user, synthetic_rows(size))
+            for accept_encoding in ('identity', 'gzip', 'br'):
+                event = _handler_event('/api/characters/', {'page_size': str(size)}, client.cookies, accept_encoding)
+
+                def wsgi_only():
+                    environ = vercel_handler.create_wsgi_environ(event)
+                    return vercel_handler.read_body(application(environ, lambda status, headers, exc_info=None: None))
+
+                raw_bytes = len(wsgi_only())
+                response = vercel_handler.handler(event, None)
+                assert response['statusCode'] == 200, response['statusCode']
+                wsgi_ms = _best_of(wsgi_only, repeat) * 1000
+                handler_ms = _best_of(lambda: vercel_handler.handler(event, None), repeat) * 1000
+                yield {
+                    'rows': size,
+                    'accept': accept_encoding,
+                    'encoding': response['headers'].get('Content-Encoding', 'identity'),
+                    'body_bytes': raw_bytes,
+                    'payload_bytes': len(response['body']),
+                    'base64': response['isBase64Encoded'],
+                    'wsgi_ms': round(wsgi_ms, 2),
+                    'overhead_ms': round(handler_ms - wsgi_ms, 2),
+                }
+
+
+# Template loader configurations compared by the render benchmark.
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def bench_render(sizes=(10, 50, 200), repeat=20):
+    """List page render time per page size: template loader and card cache, cold vs warm."""
+    templates = settings.TEMPLATES[0]
+    plain = [{**templates, 'OPTIONS': {**templates['OPTIONS'], 'loaders': PLAIN_LOADERS}}]
+    with scratch_database():
+        user = User.objects.create_user('bench')
+        import_characters(user, synthetic_rows(max(sizes)))
+        Character.objects.filter(user=user, sort_order__lt=max(sizes) // 2).update(in_trade_list=True)
+        for size in sizes:
+            request = RequestFactory().get('/')
+            request.user = user
+            page_obj = paginate_characters(request, character_queryset(user), 'default', per_page=size)
+            context = {'page_obj': page_obj, 'sort_by': 'default', 'page_query': 'sort_by=default',
+                       'total_characters': page_obj.count, 'MEDIA_URL': settings.MEDIA_URL}
+
+            def render():
+                attach_cards(page_obj)
+                return render_to_string('character_viewer/upload_and_view.html', context, request)
+
+            for loader, cards, template_settings in (
+                ('plain', 'cold', plain),
+                ('cached', 'cold', settings.TEMPLATES),
+                ('cached', 'warm', settings.TEMPLATES),
+            ):
+                with override_settings(TEMPLATES=template_settings):
+                    cache.clear()
+                    render()
+                    best = float('inf')
+                    for _ in range(repeat):
+                        if cards == 'cold':
+                            cache.clear()
+                        started = time.perf_counter()
+                        render()
+                        best = min(best, time.perf_counter() - started)
+                yield {
+                    'rows/page': size,
+                    'loader': loader,
+                    'cards': cards,
+                    'ms': round(best * 1000, 2),
+                }
+
+
+def _per_call_us(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return round((time.perf_counter() - started) / repeat * 1e6, 1)
+
+
+def bench_cache(sizes=(8,), repeat=500, render_ms=50):
+    """
+    Two-tier cache per shared tier: get latency by tier served from, and
+    renders per concurrent miss (``sizes`` threads) with and without the
+    stampede protection of the tiered get_or_set().
+    """
+    page = 'x' * 20000
+    with scratch_database(), tempfile.TemporaryDirectory() as tmp:
+        for shared in ('sqlite', 'database'):
+            with mock.patch.dict('os.environ', {'CACHE_SQLITE_PATH': os.path.join(tmp, 'cache.sqlite3')}), \
+                    override_settings(CACHES=cache_config(shared)):
+                call_command('createcachetable', verbosity=0)
+                tiered = caches['default']
+                tiered.clear()
+                tiered.set('page', page)
+                yield {
+                    'shared': shared,
+                    'local_hit_us': _per_call_us(lambda: tiered.get('page'), repeat),
+                    'shared_hit_us': _per_call_us(lambda: (tiered.clear_local(), tiered.get('page')), repeat),
+                    'miss_us': _per_call_us(lambda: tiered.get('missing'), repeat),
+                }
+
+                for label, backend in (('tiered', lambda: caches['default']), ('shared only', lambda: caches['shared'])):
+                    for size in sizes:
+                        tiered.clear()
+                        renders = []
+
+                        def render():
+                            renders.append(1)
+                            time.sleep(render_ms / 1000)
+                            return page
+
+                        def request():
+                            backend().get_or_set('stampede', render)
+                            connection.close()
+
+                        threads = [threading.Thread(target=request) for _ in range(size)]
+                        started = time.perf_counter()
+                        for thread in threads:
+                            thread.start()
+                        for thread in threads:
+                            thread.join()
+                        yield {
+                            'shared': shared,
+                            'get_or_set': label,
+                            'threads': size,
+                            'renders': len(renders),
+                            'ms': round((time.perf_counter() - started) * 1000, 1),
+                        }
+                tiered.clear()
+
+
+# Static asset references in a rendered page, and in a stylesheet.
+STATIC_REF_RE = re.compile(r'(?:href|src)="%s([^"]+)"' % re.escape(settings.STATIC_URL))
+CSS_URL_RE = re.compile(r'url\("([^"]+)"\)')
+
+
+def _gzip_size(data):
+    return len(gzip.compress(data, compresslevel=6, mtime=0))
+
+
+def bench_page_bytes(sizes=(30,)):
+    """Bytes per list page view: HTML plus static assets, first view and repeat view."""
+    with scratch_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        user = User.objects.create_user('bench')
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        for size in sizes:
+            import_characters(user, synthetic_rows(size))
+            Character.objects.filter(user=user, sort_order__lt=size // 2).update(in_trade_list=True)
+            for view in ('upload_and_view', 'trade_list'):
+                html = client.get(reverse(view)).content
+                assets = {}
+                pending = STATIC_REF_RE.findall(html.decode('utf-8'))
+                while pending:
+                    name = pending.pop()
+                    with open(finders.find(name), 'rb') as asset:
+                        assets[name] = asset.read()
+                    if name.endswith('.css'):
+                        pending += [posixpath.normpath(posixpath.join(posixpath.dirname(name), ref))
+                                    for ref in CSS_URL_RE.findall(assets[name].decode('utf-8'))]
+                html_gzip = _gzip_size(html)
+                assets_gzip = sum(_gzip_size(data) for data in assets.values())
+                yield {
+                    'rows': size,
+                    'page': view,
+                    'html_bytes': len(html),
+                    'html_gzip': html_gzip,
+                    'assets': len(assets),
+                    'assets_gzip': assets_gzip,
+                    'first_view_gzip': html_gzip + assets_gzip,
+                    # Hashed assets are cached as immutable, so repeat views fetch only HTML
+                    'repeat_view_gzip': html_gzip,
+                }
+
+
+# Boots the Vercel entry point in a fresh interpreter and times the first
+# response for each path given on the command line.
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import vercel_handler
+vercel_handler.get_application()
+timings = {'init': time.perf_counter() - started}
+for path in sys.argv[1:]:
+    started = time.perf_counter()
+    response = vercel_handler.handler({'httpMethod': 'GET', 'path': path, 'headers': {
+        'host': 'localhost', 'x-forwarded-proto': 'https'}}, None)
+    timings[path] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def _import_times(stderr, top=8):
+    """Sum ``-X importtime`` self times by top-level package, largest first."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, module = line[len('import time:'):].split('|')
+        package = module.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def bench_cold_start(paths=('/admin/login/', '/health/'), repeat=3):
+    """
+    Import time per package and time to first response, with and without the
+    boot mode. The admin login page needs the admin URLconf and a template
+    render; '/' would only time a redirect.
+    """
+    for boot in ('false', 'true'):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'mudae_project.vercel_settings', 'COLD_START_BOOT': boot}
+        runs = []
+        for _ in range(repeat):
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', COLD_START_SCRIPT, *paths],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            runs.append((json.loads(process.stdout.splitlines()[-1]), process.stderr))
+        timings, stderr = min(runs, key=lambda run: sum(run[0].values()))
+        for package, self_us in _import_times(stderr):
+            yield {'boot': boot, 'package': package, 'import_ms': round(self_us / 1000, 1)}
+        for step, seconds in timings.items():
+            yield {'boot': boot, 'step': step, 'ms': round(seconds * 1000, 1)}
+        yield {'boot': boot, 'step': 'total', 'ms': round(sum(timings.values()) * 1000, 1)}
+
+
+SCENARIOS = {
+    'import': bench_import,
+    'reimport': bench_reimport,
+    'parse': bench_parse,
+    'parse-text': bench_parse_text,
+    'sort': bench_sort,
+    'paginate': bench_paginate,
+    'handler': bench_handler,
+    'cold-start': bench_cold_start,
+    'page-bytes': bench_page_bytes,
+    'render': bench_render,
+    'cache': bench_cache,
+    'search': bench_search,
+    'export': bench_export,
+    'leaderboard': bench_leaderboard,
+}
@@ -0,0 +1,98 @@
+"""
+Streaming exports of a user's characters.
+
+Rows are read from the database in keyset batches (``iter_keyset``) and
+encoded as they arrive, so an export holds one batch and one output chunk
+in memory however large the collection is, and its first bytes are sent
+after the first batch rather than after the whole query.
+
+Each format round-trips through the importer where it can: the JSON export
+is an upload file, and the text export uses the ``$mm`` line format that
+``parsers.parse_mudae_line`` reads (without series or notes, which that
+format doesn't carry). CSV is for spreadsheets.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+
+from .pagination import iter_keyset
+
+# Fields of the upload format, in the order exports write them.
+EXPORT_FIELDS = ('rank', 'name', 'series', 'value', 'note', 'image', 'keys', 'key_type')
+
+# Bytes gathered into each chunk of the response.
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def export_batch_size():
+    return getattr(settings, 'CHARACTER_EXPORT_BATCH_SIZE', 1000)
+
+
+def iter_export_characters(queryset, ordering):
+    """Every character of ``queryset`` in ``ordering``, a batch at a time."""
+    return iter_keyset(queryset.only('id', *EXPORT_FIELDS, 'kakera', 'rank_num', 'sort_order'),
+                       ordering, export_batch_size())
+
+
+def iter_csv(characters):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for character in characters:
+        writer.writerow([getattr(character, field) for field in EXPORT_FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_json(characters):
+    yield '{"characters": ['
+    separator = '\n'
+    for character in characters:
+        yield separator + json.dumps({field: getattr(character, field) for field in EXPORT_FIELDS},
+                                     ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+def format_mudae_line(character):
+    """The ``$mm`` line for ``character``, the inverse of ``parse_mudae_line()``."""
+    line = f'{character.rank} - {character.name}' if character.rank else character.name
+    if character.key_type and character.keys:
+        line += f' · :{character.key_type}key:  ({character.keys})'
+    line += f' {character.kakera:,} ka'
+    if character.image:
+        line += f' - {character.image}'
+    return line
+
+
+def iter_mudae_text(characters):
+    for character in characters:
+        yield format_mudae_line(character) + '\n'
+
+
+# Writers by format: (content type, function from characters to text pieces).
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', iter_csv),
+    'json': ('application/json', iter_json),
+    'txt': ('text/plain; charset=utf-8', iter_mudae_text),
+}
+
+
+def encode_chunks(pieces, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """UTF-8 encode text ``pieces``, joined into chunks of about ``chunk_bytes``."""
+    pending = []
+    size = 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield b''.join(pending)
@@ -0,0 +1,72 @@
+"""
+Cache of rendered character cards.
+
+A list page is a few fixed blocks around one card per character, and the
+cards are most of the render time. Each card is cached under everything it
+is rendered from: the character id, its ``fingerprint`` (the importer's hash
+of the row's content, which changes whenever a re-import changes the row),
+its trade-list flag, whether its image is known to be broken, and which
+page it is for. So a mutation never needs to delete anything: a toggle or
+re-import gives the changed rows new keys, the rest of the page is reused,
+and superseded cards simply expire.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .linkcheck import broken_image_urls
+from .thumbnails import thumbnail_url
+
+CARD_TEMPLATE = 'character_viewer/_character_card.html'
+
+# Bump when _character_card.html changes, so stale markup is never served.
+CARD_VERSION = 1
+
+CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def card_cache_key(character, trade_page):
+    page = 'trade' if trade_page else 'collection'
+    return (f'card:{CARD_VERSION}:{page}:{character.pk}:{character.fingerprint}'
+            f':{int(character.in_trade_list)}:{int(character.image_exists)}')
+
+
+def _is_remote(image):
+    return image.startswith(('http://', 'https://'))
+
+
+def attach_cards(characters, trade_page=False):
+    """
+    Set ``card_html`` on each of ``characters`` from the card cache.
+
+    Cards missing from the cache are rendered and stored with one
+    ``set_many()``; a warm page costs one ``get_many()``. Returns the number
+    of cards rendered.
+    """
+    characters = list(characters)
+    broken_images = broken_image_urls(character.image for character in characters if _is_remote(character.image))
+    for character in characters:
+        # Unchecked URLs are assumed available until the link checker says otherwise
+        character.image_exists = bool(character.image) and character.image not in broken_images
+
+    keys = {character.pk: card_cache_key(character, trade_page) for character in characters}
+    cards = cache.get_many(keys.values())
+    missing = [character for character in characters if keys[character.pk] not in cards]
+    if missing:
+        template = get_template(CARD_TEMPLATE)
+        rendered = {}
+        for character in missing:
+            if _is_remote(character.image):
+                character.thumbnail_url = thumbnail_url(character.image)
+            rendered[keys[character.pk]] = template.render({
+                'character': character,
+                'trade_page': trade_page,
+                'MEDIA_URL': settings.MEDIA_URL,
+            })
+        cache.set_many(rendered, CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+
+    for character in characters:
+        character.card_html = mark_safe(cards[keys[character.pk]])
+    return len(missing)
@@ -0,0 +1,150 @@
+"""
+Server-wide leaderboard of collections by total kakera, characters and keys.
+
+The entries are the CollectionStats rows, which imports and clears already
+keep current, and each metric's column is indexed, so the top K is an index
+range scan. A user's rank is one plus the number of collections scoring
+more than theirs; a B-tree can only count those row by row, so each metric
+also keeps a Fenwick tree (binary indexed tree) of how many collections
+have each score, stored sparsely as LeaderboardNode rows. Moving a
+collection's score updates O(log MAX_SCORE) nodes, and a rank reads
+O(log MAX_SCORE) nodes in one query, however many users there are.
+
+Only collections with characters are ranked. ``python manage.py
+rebuild_leaderboard`` recomputes the entries from the characters and
+rebuilds the trees.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import CollectionStats, LeaderboardNode
+
+# Metric name -> CollectionStats column.
+METRICS = {
+    'kakera': 'total_kakera',
+    'characters': 'characters',
+    'keys': 'total_keys',
+}
+
+# Scores are tree positions 1..TREE_SIZE; larger scores are clamped (tied).
+TREE_SIZE = 2 ** 32
+MAX_SCORE = TREE_SIZE - 1
+
+TOP_K = 50
+
+
+def _position(score):
+    return min(max(score, 0), MAX_SCORE) + 1
+
+
+def _covering_nodes(score):
+    """Nodes whose ranges include ``score``: the ones a change to it updates."""
+    node = _position(score)
+    while node <= TREE_SIZE:
+        yield node
+        node += node & -node
+
+
+def _prefix_nodes(score):
+    """Nodes that sum to the number of scores at most ``score``."""
+    node = _position(score)
+    while node > 0:
+        yield node
+        node -= node & -node
+
+
+def leaderboard_scores(stats):
+    """``{metric: score}`` for a CollectionStats row, or None if it isn't ranked."""
+    if stats is None or not stats.characters:
+        return None
+    return {metric: getattr(stats, field) for metric, field in METRICS.items()}
+
+
+def tree_counts(scores):
+    """Fenwick node counts for an iterable of scores, as ``{node: collections}``."""
+    counts = Counter()
+    for score in scores:
+        for node in _covering_nodes(score):
+            counts[node] += 1
+    return counts
+
+
+def move_collection(before, after):
+    """
+    Move one collection in the trees from the scores ``before`` to the
+    scores ``after`` (either may be None, for not ranked). Three statements
+    cover every metric: create missing nodes, then increment and decrement.
+    """
+    changed = Counter()
+    for metric in METRICS:
+        if before is not None:
+            changed.subtract((metric, node) for node in _covering_nodes(before[metric]))
+        if after is not None:
+            changed.update((metric, node) for node in _covering_nodes(after[metric]))
+    changed = {key: delta for key, delta in changed.items() if delta}
+    if not changed:
+        return
+    LeaderboardNode.objects.bulk_create(
+        [LeaderboardNode(metric=metric, node=node) for metric, node in sorted(changed)], ignore_conflicts=True,
+    )
+    for delta in (1, -1):
+        selected = Q()
+        for metric in METRICS:
+            nodes = sorted(node for (name, node), change in changed.items() if name == metric and change == delta)
+            if nodes:
+                selected |= Q(metric=metric, node__in=nodes)
+        if selected:
+            LeaderboardNode.objects.filter(selected).update(collections=F('collections') + delta)
+
+
+def rank_of(metric, score):
+    """``(rank, ranked collections)`` for a collection scoring ``score``."""
+    nodes = dict(
+        LeaderboardNode.objects.filter(metric=metric, node__in={*_prefix_nodes(score), TREE_SIZE})
+        .values_list('node', 'collections')
+    )
+    at_most = sum(nodes.get(node, 0) for node in _prefix_nodes(score))
+    total = nodes.get(TREE_SIZE, 0)
+    return total - at_most + 1, total
+
+
+def user_rank(user, metric):
+    """``(rank, score, ranked collections)`` for ``user``, or None if they aren't ranked."""
+    scores = leaderboard_scores(CollectionStats.objects.filter(user=user).first())
+    if scores is None:
+        return None
+    rank, total = rank_of(metric, scores[metric])
+    return rank, scores[metric], total
+
+
+def top_collections(metric, k=TOP_K):
+    """
+    The ``k`` best collections by ``metric`` as ``(rank, username, score)``,
+    ties sharing a rank and listed by user id.
+    """
+    field = METRICS[metric]
+    rows = (CollectionStats.objects.filter(characters__gt=0).order_by(f'-{field}', 'user')
+            .values_list('user__username', field)[:k])
+    entries = []
+    for position, (username, score) in enumerate(rows, 1):
+        rank = entries[-1][0] if entries and entries[-1][2] == score else position
+        entries.append((rank, username, score))
+    return entries
+
+
+@transaction.atomic
+def rebuild_trees():
+    """Replace every tree with one built from the current CollectionStats rows; returns the node count."""
+    LeaderboardNode.objects.all().delete()
+    ranked = CollectionStats.objects.filter(characters__gt=0)
+    nodes = 0
+    for metric, field in METRICS.items():
+        counts = tree_counts(ranked.values_list(field, flat=True).iterator())
+        LeaderboardNode.objects.bulk_create(
+            [LeaderboardNode(metric=metric, node=node, collections=count) for node, count in counts.items()],
+            batch_size=1000,
+        )
+        nodes += len(counts)
+    return nodes
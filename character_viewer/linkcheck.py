@@ -0,0 +1,241 @@
+"""
+Concurrent checker for character image URLs.
+
+Results go into the shared ImageLink table, keyed by URL, so an image linked
+by many users is checked once and rechecked only after RECHECK_AFTER. Each
+URL is probed with HEAD, falling back to a one-byte ranged GET for hosts that
+reject HEAD. Probes run on worker threads under an asyncio event loop, which
+bounds the total parallelism and spaces out requests to each host. Requests
+go through ``remote.open_public_url``, so only public http(s) hosts are
+probed, on every redirect hop; other URLs are recorded as errors.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Character, Collection, ImageLink
+from .remote import open_public_url
+
+logger = logging.getLogger(__name__)
+
+# Probes in flight at once, across all hosts.
+CONCURRENCY = 16
+
+# Minimum seconds between the start of two probes to the same host.
+PER_HOST_INTERVAL = 0.2
+
+TIMEOUT = 10
+
+# How long a result is trusted before the URL is probed again.
+RECHECK_AFTER = timedelta(days=7)
+
+# Statuses that mean the image is gone, rather than temporarily unavailable.
+GONE_STATUSES = {404, 410}
+
+# Statuses from hosts that refuse HEAD but may answer a GET.
+HEAD_REJECTED_STATUSES = {403, 405, 501}
+
+# imgur redirects deleted images to this placeholder instead of a 404.
+REMOVED_PLACEHOLDERS = ('https://i.imgur.com/removed.png',)
+
+USER_AGENT = 'mudae-viewer-linkcheck/1.0'
+
+# URLs looked up per query, to stay under SQLite's bound-parameter limit.
+QUERY_CHUNK = 500
+
+
+@dataclass
+class LinkCheckResult:
+    """Summary of one checker run."""
+    checked: int = 0
+    ok: int = 0
+    broken: int = 0
+    errors: int = 0
+    fresh: int = 0  # Skipped because a recent result exists
+    elapsed: float = 0.0
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _request(url, method, headers=None):
+    request = urllib.request.Request(url, method=method, headers={'User-Agent': USER_AGENT, **(headers or {})})
+    with open_public_url(request, timeout=TIMEOUT) as response:
+        if response.geturl() in REMOVED_PLACEHOLDERS:
+            return 404
+        return response.status
+
+
+def probe(url):
+    """
+    Return ``(status, status_code)`` for one URL, blocking.
+
+    status is ImageLink.OK, BROKEN or ERROR; status_code is the last HTTP
+    status seen, or None if no response arrived.
+    """
+    status_code = None
+    for method, headers in (('HEAD', None), ('GET', {'Range': 'bytes=0-0'})):
+        try:
+            status_code = _request(url, method, headers)
+        except urllib.error.HTTPError as e:
+            status_code = e.code
+        except (OSError, ValueError):
+            return ImageLink.ERROR, status_code
+        if method == 'HEAD' and status_code in HEAD_REJECTED_STATUSES:
+            continue
+        break
+
+    if 200 <= status_code < 300:
+        return ImageLink.OK, status_code
+    if status_code in GONE_STATUSES:
+        return ImageLink.BROKEN, status_code
+    return ImageLink.ERROR, status_code
+
+
+class HostRateLimiter:
+    """Spaces out the start of requests to the same host."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.locks = {}
+        self.next_start = {}
+
+    async def wait(self, host):
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            # The event loop may wake a sleep up to its clock resolution early
+            while (delay := self.next_start.get(host, 0) - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            self.next_start[host] = time.monotonic() + self.interval
+
+
+async def check_urls(urls, concurrency=CONCURRENCY, per_host_interval=PER_HOST_INTERVAL):
+    """Probe ``urls`` concurrently; return {url: (status, status_code)}."""
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(per_host_interval)
+
+    async def check(url):
+        # Wait for the host's turn while holding a slot, so the probe starts
+        # then rather than after queueing behind other hosts' probes
+        async with semaphore:
+            await limiter.wait(urlparse(url).netloc)
+            return url, await asyncio.to_thread(probe, url)
+
+    return dict(await asyncio.gather(*(check(url) for url in urls)))
+
+
+def _link_statuses(urls, **filters):
+    """{url: status} for the ImageLink rows of ``urls`` matching ``filters``."""
+    urls = list(urls)
+    statuses = {}
+    for start in range(0, len(urls), QUERY_CHUNK):
+        hashes = [url_hash(url) for url in urls[start:start + QUERY_CHUNK]]
+        statuses.update(ImageLink.objects.filter(url_hash__in=hashes, **filters).values_list('url', 'status'))
+    return statuses
+
+
+def stale_urls(urls, force=False):
+    """The subset of ``urls`` with no result newer than RECHECK_AFTER."""
+    urls = {url for url in urls if url.startswith(('http://', 'https://'))}
+    if force:
+        return urls
+    return urls - _link_statuses(urls, checked_at__gte=timezone.now() - RECHECK_AFTER).keys()
+
+
+def _save_results(results):
+    """Upsert results; return the URLs whose broken-ness changed."""
+    previous = _link_statuses(results)
+    now = timezone.now()
+    ImageLink.objects.bulk_create(
+        [ImageLink(url_hash=url_hash(url), url=url, status=status, status_code=status_code, checked_at=now)
+         for url, (status, status_code) in results.items()],
+        update_conflicts=True,
+        unique_fields=['url_hash'],
+        update_fields=['status', 'status_code', 'checked_at'],
+        batch_size=500,
+    )
+    return [
+        url for url, (status, _) in results.items()
+        if (status == ImageLink.BROKEN) != (previous.get(url) == ImageLink.BROKEN)
+    ]
+
+
+def check_image_links(urls, force=False, concurrency=CONCURRENCY, per_host_interval=PER_HOST_INTERVAL):
+    """
+    Check every stale URL in ``urls`` and record the results.
+
+    Users whose images changed between broken and not broken get their
+    collection version bumped, so cached pages pick up the change.
+    """
+    started = time.perf_counter()
+    all_urls = set(urls)
+    pending = stale_urls(all_urls, force)
+    result = LinkCheckResult(fresh=len(all_urls) - len(pending))
+    if not pending:
+        return result
+
+    results = asyncio.run(check_urls(sorted(pending), concurrency, per_host_interval))
+    changed = _save_results(results)
+    for start in range(0, len(changed), QUERY_CHUNK):
+        hashes = [url_hash(url) for url in changed[start:start + QUERY_CHUNK]]
+        users = Character.objects.filter(image_hash__in=hashes).values('user')
+        Collection.objects.filter(user__in=users).update(version=F('version') + 1, updated_at=timezone.now())
+
+    for status, _ in results.values():
+        result.checked += 1
+        if status == ImageLink.OK:
+            result.ok += 1
+        elif status == ImageLink.BROKEN:
+            result.broken += 1
+        else:
+            result.errors += 1
+    result.elapsed = time.perf_counter() - started
+    logger.info("Checked %d image links (%d broken, %d errors) in %.2fs",
+                result.checked, result.broken, result.errors, result.elapsed)
+    return result
+
+
+def user_image_urls(user):
+    """Distinct remote image URLs in ``user``'s collection."""
+    return set(
+        Character.objects.filter(user=user, image__startswith='http')
+        .order_by().values_list('image', flat=True).distinct()
+    )
+
+
+def broken_image_urls(urls):
+    """The subset of ``urls`` last seen broken."""
+    return set(_link_statuses(urls, status=ImageLink.BROKEN))
+
+
+def check_user_links_in_background(user):
+    """
+    Check ``user``'s image links on a daemon thread.
+
+    Used after an import on long-running servers. Serverless workers may be
+    frozen once the response is sent, so there, run the check_image_links
+    management command on a schedule instead.
+    """
+    def run():
+        try:
+            check_image_links(user_image_urls(user))
+        except Exception:
+            logger.exception("Background image link check failed")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name='image-link-check', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,64 @@
+"""
+Query helpers shared by the collection and trade list views.
+"""
+from urllib.parse import urlencode
+
+from .models import Character
+from .pagination import paginate
+from .search import search_characters
+
+# Characters shown per page in the list views.
+PAGE_SIZE = 10
+
+# Orderings for the ``sort_by`` query parameter. Rank and kakera sort on the
+# typed columns filled at import time, so the database never has to parse
+# the display strings. Each ends in id, in the same direction, so the order
+# is total and can be used as a pagination cursor.
+SORT_ORDERINGS = {
+    'default': ('sort_order', 'id'),
+    'rank': ('rank_num', 'id'),
+    'kakera': ('-kakera', '-id'),
+    'keys': ('-keys', '-id'),
+    # Only while searching; best match first (see search.search_rank)
+    'relevance': ('search_rank', 'id'),
+}
+
+
+def get_sort_by(request):
+    """
+    Return the requested sort key. Searches default to relevance, anything
+    else to the JSON order.
+    """
+    searching = bool(request.GET.get('search'))
+    sort_by = request.GET.get('sort_by') or ('relevance' if searching else 'default')
+    if sort_by not in SORT_ORDERINGS or (sort_by == 'relevance' and not searching):
+        return 'default'
+    return sort_by
+
+
+def character_queryset(user, search_query='', sort_by='default', trade_only=False):
+    """Characters owned by ``user``, filtered and ordered for a list view."""
+    characters = Character.objects.filter(user=user)
+    if trade_only:
+        characters = characters.filter(in_trade_list=True)
+    if search_query:
+        characters = search_characters(characters, user, search_query)
+    elif sort_by == 'relevance':
+        sort_by = 'default'
+    return characters.order_by(*SORT_ORDERINGS.get(sort_by, SORT_ORDERINGS['default']))
+
+
+def paginate_characters(request, queryset, sort_by, search_query='', trade_only=False, per_page=PAGE_SIZE):
+    """Paginate a list view queryset from the request's ``cursor``/``page`` parameters."""
+    key = f"{'trade' if trade_only else 'all'}:{sort_by}:{search_query}"
+    return paginate(
+        queryset, SORT_ORDERINGS[sort_by], per_page,
+        cursor=request.GET.get('cursor'), page=request.GET.get('page'), key=key,
+    )
+
+
+def listing_query(search_query, sort_by):
+    """Query string that keeps the current search and sort on pagination links."""
+    params = {'search': search_query} if search_query else {}
+    params['sort_by'] = sort_by
+    return urlencode(params)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from character_viewer.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Run a performance benchmark scenario against a scratch database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS), help='Scenario to run')
+        parser.add_argument('--sizes', type=int, nargs='+', help='Override the row counts measured by the scenario')
+
+    def handle(self, *args, **options):
+        scenario = SCENARIOS[options['scenario']]
+        kwargs = {}
+        if options['sizes']:
+            kwargs['sizes'] = options['sizes']
+
+        self.stdout.write(f"Running '{options['scenario']}' benchmark...")
+        for result in scenario(**kwargs):
+            self.stdout.write('  '.join(f'{key}={value}' for key, value in result.items()))
+
+        self.stdout.write(self.style.SUCCESS('Benchmark completed'))
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from character_viewer.linkcheck import CONCURRENCY, PER_HOST_INTERVAL, check_image_links, user_image_urls
+from character_viewer.models import Character
+
+
+class Command(BaseCommand):
+    help = 'Check character image URLs and record which ones are broken'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Only check this user\'s images (default: everyone\'s)')
+        parser.add_argument('--force', action='store_true', help='Recheck URLs even if they were checked recently')
+        parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help='Requests in flight at once')
+        parser.add_argument('--per-host-interval', type=float, default=PER_HOST_INTERVAL,
+                            help='Minimum seconds between requests to one host')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+            urls = user_image_urls(user)
+        else:
+            urls = set(
+                Character.objects.filter(image__startswith='http')
+                .order_by().values_list('image', flat=True).distinct()
+            )
+
+        result = check_image_links(
+            urls, force=options['force'],
+            concurrency=options['concurrency'], per_host_interval=options['per_host_interval'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {result.checked} image links in {result.elapsed:.2f}s: '
+            f'{result.ok} ok, {result.broken} broken, {result.errors} errors '
+            f'({result.fresh} skipped as recently checked)'
+        ))
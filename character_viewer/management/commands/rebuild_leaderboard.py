@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from character_viewer.leaderboard import rebuild_trees
+from character_viewer.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = 'Reconcile collection stats with the characters and rebuild the leaderboard rank trees'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        checked, corrected = reconcile_stats()
+        nodes = rebuild_trees()
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} collections ({corrected} corrected) and rebuilt '
+            f'{nodes} leaderboard nodes in {time.perf_counter() - started:.2f}s'
+        ))
@@ -21,6 +21,9 @@ class Command(BaseCommand):
             # Run migrations
             self.stdout.write('Running migrations...')
             call_command('migrate', verbosity=2)
+
+        # The database cache tier's table, if that tier is configured
+        call_command('createcachetable')
             
         # Check if we're on Render and need to do any additional setup
         if 'RENDER_EXTERNAL_HOSTNAME' in os.environ:
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0005_character_key_type_character_keys_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='kakera',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='rank_num',
+            field=models.IntegerField(default=0),
+        ),
+    ]
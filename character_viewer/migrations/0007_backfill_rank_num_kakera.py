@@ -0,0 +1,36 @@
+import re
+
+from django.db import migrations
+
+NUMBER_RE = re.compile(r'\d[\d,]*')
+BATCH_SIZE = 2000
+
+
+def parse_number(text):
+    match = NUMBER_RE.search(text or '')
+    return int(match.group().replace(',', '')) if match else 0
+
+
+def backfill(apps, schema_editor):
+    Character = apps.get_model('character_viewer', 'Character')
+    pending = []
+    for character in Character.objects.only('id', 'rank', 'value').iterator(chunk_size=BATCH_SIZE):
+        character.rank_num = parse_number(character.rank)
+        character.kakera = parse_number(character.value)
+        pending.append(character)
+        if len(pending) >= BATCH_SIZE:
+            Character.objects.bulk_update(pending, ['rank_num', 'kakera'])
+            pending = []
+    if pending:
+        Character.objects.bulk_update(pending, ['rank_num', 'kakera'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0006_character_rank_num_kakera'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
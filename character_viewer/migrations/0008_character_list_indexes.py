@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0007_backfill_rank_num_kakera'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', 'sort_order', 'id'], name='char_user_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', 'rank_num', 'id'], name='char_user_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', '-kakera', '-id'], name='char_user_kakera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['user', '-keys', '-id'], name='char_user_keys_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(condition=models.Q(('in_trade_list', True)), fields=['user', 'sort_order', 'id'], name='char_trade_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(condition=models.Q(('in_trade_list', True)), fields=['user', 'rank_num', 'id'], name='char_trade_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(condition=models.Q(('in_trade_list', True)), fields=['user', '-kakera', '-id'], name='char_trade_kakera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(condition=models.Q(('in_trade_list', True)), fields=['user', '-keys', '-id'], name='char_trade_keys_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:43
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Copied from importer.fingerprint() as of this migration, so later changes
+# there don't change what existing rows are backfilled with.
+STRING_FIELDS = ('rank', 'name', 'series', 'value', 'note', 'image', 'key_type')
+BATCH_SIZE = 2000
+
+
+def fingerprint(character):
+    content = '\x1f'.join(str(getattr(character, name)) for name in STRING_FIELDS)
+    return hashlib.sha1(f"{content}\x1f{character.keys}".encode('utf-8')).hexdigest()
+
+
+def backfill(apps, schema_editor):
+    Character = apps.get_model('character_viewer', 'Character')
+    pending = []
+    rows = Character.objects.only('id', 'keys', *STRING_FIELDS).order_by()
+    for character in rows.iterator(chunk_size=BATCH_SIZE):
+        character.fingerprint = fingerprint(character)
+        pending.append(character)
+        if len(pending) >= BATCH_SIZE:
+            Character.objects.bulk_update(pending, ['fingerprint'])
+            pending = []
+    if pending:
+        Character.objects.bulk_update(pending, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0008_character_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_hash', models.CharField(blank=True, max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='collection', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0010_collection_character_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collection',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0011_collection_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(max_length=64, unique=True)),
+                ('url', models.TextField()),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('broken', 'Broken'), ('error', 'Error')], max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,90 @@
+"""
+Trigram indexes on PostgreSQL, an FTS5 trigram table on SQLite; see
+character_viewer.search. The SQL is a copy of what that module ran when this
+migration was written, so later changes to it don't alter this migration.
+"""
+from django.db import DatabaseError, migrations
+
+FTS_TABLE = 'character_search'
+CHARACTER_TABLE = 'character_viewer_character'
+
+POSTGRES_INDEXES = {
+    'char_name_trgm_idx': 'name',
+    'char_series_trgm_idx': 'series',
+}
+
+OWNER_TOKEN = "'<' || {}.user_id || '>'"
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f'''
+        AFTER INSERT ON {CHARACTER_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, name, series, owner)
+            VALUES (new.id, new.name, new.series, {OWNER_TOKEN.format('new')});
+        END''',
+    f'{FTS_TABLE}_ad': f'''
+        AFTER DELETE ON {CHARACTER_TABLE} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END''',
+    f'{FTS_TABLE}_au': f'''
+        AFTER UPDATE OF name, series, user_id ON {CHARACTER_TABLE} BEGIN
+            UPDATE {FTS_TABLE} SET name = new.name, series = new.series, owner = {OWNER_TOKEN.format('new')}
+            WHERE rowid = old.id;
+        END''',
+}
+
+
+def _sqlite_supports_trigram_fts(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+    except DatabaseError:
+        return False
+    cursor.execute('DROP TABLE temp.fts_probe')
+    return True
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for index, column in POSTGRES_INDEXES.items():
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index} ON {CHARACTER_TABLE} '
+                    f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+                )
+        elif connection.vendor == 'sqlite':
+            if not _sqlite_supports_trigram_fts(cursor):
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, series, owner, tokenize='trigram')"
+            )
+            for trigger, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger} {body}')
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, series, owner) '
+                f'SELECT id, name, series, {OWNER_TOKEN.format(CHARACTER_TABLE)} FROM {CHARACTER_TABLE}'
+            )
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for index in POSTGRES_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        elif connection.vendor == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0012_imagelink'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+TOP_VALUE_COUNT = 15
+
+
+def backfill(apps, schema_editor):
+    Character = apps.get_model('character_viewer', 'Character')
+    CollectionStats = apps.get_model('character_viewer', 'CollectionStats')
+    # order_by() drops Meta.ordering, which would make DISTINCT per (user, sort_order)
+    owners = Character.objects.exclude(user=None).order_by().values_list('user', flat=True).distinct()
+    for user_id in owners.iterator():
+        characters = Character.objects.filter(user_id=user_id)
+        totals = characters.aggregate(
+            count=Count('id'), value=Sum('kakera'),
+            trade_count=Count('id', filter=Q(in_trade_list=True)),
+            trade_value=Sum('kakera', filter=Q(in_trade_list=True)),
+        )
+        top = characters.order_by('-kakera', '-id').values_list('kakera', flat=True)[:TOP_VALUE_COUNT]
+        keys = (characters.filter(keys__gt=0).exclude(key_type='')
+                .values('key_type').annotate(holders=Count('id'), total=Sum('keys'))
+                .values_list('key_type', 'holders', 'total'))
+        CollectionStats.objects.create(
+            user_id=user_id,
+            characters=totals['count'],
+            total_kakera=totals['value'] or 0,
+            top_kakera=sum(top),
+            keys={key_type: {'characters': holders, 'keys': total} for key_type, holders, total in keys},
+            trade_characters=totals['trade_count'],
+            trade_kakera=totals['trade_value'] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0013_character_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('characters', models.PositiveIntegerField(default=0)),
+                ('total_kakera', models.BigIntegerField(default=0)),
+                ('top_kakera', models.BigIntegerField(default=0)),
+                ('keys', models.JSONField(default=dict)),
+                ('trade_characters', models.PositiveIntegerField(default=0)),
+                ('trade_kakera', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='collection_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
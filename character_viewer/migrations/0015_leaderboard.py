@@ -0,0 +1,82 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:09
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Copies of character_viewer.leaderboard's definitions when this migration
+# was written, so later changes to that module don't alter it.
+METRICS = {
+    'kakera': 'total_kakera',
+    'characters': 'characters',
+    'keys': 'total_keys',
+}
+TREE_SIZE = 2 ** 32
+
+
+def tree_counts(scores):
+    counts = Counter()
+    for score in scores:
+        node = min(max(score, 0), TREE_SIZE - 1) + 1
+        while node <= TREE_SIZE:
+            counts[node] += 1
+            node += node & -node
+    return counts
+
+
+def backfill(apps, schema_editor):
+    CollectionStats = apps.get_model('character_viewer', 'CollectionStats')
+    LeaderboardNode = apps.get_model('character_viewer', 'LeaderboardNode')
+    for stats in CollectionStats.objects.iterator():
+        stats.total_keys = sum(held['keys'] for held in stats.keys.values())
+        stats.save(update_fields=['total_keys'])
+    ranked = CollectionStats.objects.filter(characters__gt=0)
+    for metric, field in METRICS.items():
+        counts = tree_counts(ranked.values_list(field, flat=True).iterator())
+        LeaderboardNode.objects.bulk_create(
+            [LeaderboardNode(metric=metric, node=node, collections=count) for node, count in counts.items()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0014_collectionstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=20)),
+                ('node', models.BigIntegerField()),
+                ('collections', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='collectionstats',
+            name='total_keys',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='collectionstats',
+            index=models.Index(fields=['-total_kakera', 'user'], name='stats_kakera_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collectionstats',
+            index=models.Index(fields=['-characters', 'user'], name='stats_characters_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collectionstats',
+            index=models.Index(fields=['-total_keys', 'user'], name='stats_keys_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardnode',
+            constraint=models.UniqueConstraint(fields=('metric', 'node'), name='leaderboard_node_unique'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def backfill(apps, schema_editor):
+    Character = apps.get_model('character_viewer', 'Character')
+    pending = []
+    remote = Character.objects.filter(models.Q(image__startswith='http://') | models.Q(image__startswith='https://'))
+    for character in remote.only('id', 'image').iterator(chunk_size=BATCH_SIZE):
+        character.image_hash = url_hash(character.image)
+        pending.append(character)
+        if len(pending) >= BATCH_SIZE:
+            Character.objects.bulk_update(pending, ['image_hash'])
+            pending = []
+    if pending:
+        Character.objects.bulk_update(pending, ['image_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character_viewer', '0015_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='image_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        # Built after the backfill, rather than maintained through it
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['image_hash', 'user'], name='char_image_hash_idx'),
+        ),
+    ]
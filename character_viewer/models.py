@@ -13,9 +13,128 @@ class Character(models.Model):
     in_trade_list = models.BooleanField(default=False)  # For tracking trade list status
     keys = models.IntegerField(default=0)  # Number of keys for the character
     key_type = models.CharField(max_length=10, blank=True)  # Type of key (bronze, silver, gold, chaos)
+    rank_num = models.IntegerField(default=0)  # Numeric rank parsed from "#1,275" (0 if unranked)
+    kakera = models.IntegerField(default=0)  # Numeric kakera parsed from "170 ka"
+    fingerprint = models.CharField(max_length=40, blank=True)  # Hash of the imported fields, for re-import diffs
+    image_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of a remote image URL, as ImageLink.url_hash
     
     def __str__(self):
         return f"{self.name} ({self.series})" if self.series else f"{self.name}"
         
     class Meta:
-        ordering = ['sort_order']
\ No newline at end of file
+        ordering = ['sort_order']
+        # One index per list view ordering (including its id tie-breaker),
+        # each led by the owning user, plus partial copies covering only
+        # trade-listed rows for the trade list.
+        indexes = [
+            models.Index(fields=['user', 'sort_order', 'id'], name='char_user_sort_idx'),
+            models.Index(fields=['user', 'rank_num', 'id'], name='char_user_rank_idx'),
+            models.Index(fields=['user', '-kakera', '-id'], name='char_user_kakera_idx'),
+            models.Index(fields=['user', '-keys', '-id'], name='char_user_keys_idx'),
+            models.Index(fields=['user', 'sort_order', 'id'], name='char_trade_sort_idx',
+                         condition=models.Q(in_trade_list=True)),
+            models.Index(fields=['user', 'rank_num', 'id'], name='char_trade_rank_idx',
+                         condition=models.Q(in_trade_list=True)),
+            models.Index(fields=['user', '-kakera', '-id'], name='char_trade_kakera_idx',
+                         condition=models.Q(in_trade_list=True)),
+            models.Index(fields=['user', '-keys', '-id'], name='char_trade_keys_idx',
+                         condition=models.Q(in_trade_list=True)),
+            # Owners of an image, for link checks that change its status
+            models.Index(fields=['image_hash', 'user'], name='char_image_hash_idx'),
+        ]
+
+
+class Collection(models.Model):
+    """Per-user bookkeeping for a character collection."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='collection')
+    upload_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the last imported file
+    version = models.PositiveIntegerField(default=0)  # Bumped on every change to the user's characters
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Collection of {self.user}"
+
+
+# Display order of key types in collection stats; any others follow alphabetically.
+KEY_TYPE_ORDER = ('bronze', 'silver', 'gold', 'chaos')
+
+
+class CollectionStats(models.Model):
+    """
+    Summary figures for a user's collection, shown on the list pages.
+
+    Recomputed from the characters on every import and kept current by the
+    trade-list and clear views (see character_viewer.stats), so showing them
+    is a single row read.
+    """
+    TOP_VALUE_COUNT = 15  # Characters summed for the "top value", as in $mm
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='collection_stats')
+    characters = models.PositiveIntegerField(default=0)
+    total_kakera = models.BigIntegerField(default=0)
+    top_kakera = models.BigIntegerField(default=0)  # Sum of the TOP_VALUE_COUNT most valuable characters
+    keys = models.JSONField(default=dict)  # key_type -> {"characters": ..., "keys": ...}
+    total_keys = models.PositiveIntegerField(default=0)
+    trade_characters = models.PositiveIntegerField(default=0)
+    trade_kakera = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Leaderboard orderings (see character_viewer.leaderboard)
+        indexes = [
+            models.Index(fields=['-total_kakera', 'user'], name='stats_kakera_rank_idx'),
+            models.Index(fields=['-characters', 'user'], name='stats_characters_rank_idx'),
+            models.Index(fields=['-total_keys', 'user'], name='stats_keys_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Stats of {self.user}"
+
+    @property
+    def average_kakera(self):
+        return round(self.total_kakera / self.characters) if self.characters else 0
+
+    @property
+    def key_counts(self):
+        """``(key_type, characters, keys)`` for each key type held, in display order."""
+        def position(key_type):
+            return (KEY_TYPE_ORDER.index(key_type) if key_type in KEY_TYPE_ORDER else len(KEY_TYPE_ORDER), key_type)
+
+        return [(key_type, self.keys[key_type]['characters'], self.keys[key_type]['keys'])
+                for key_type in sorted(self.keys, key=position)]
+
+
+class LeaderboardNode(models.Model):
+    """
+    One node of a leaderboard metric's Fenwick tree: how many ranked
+    collections have a score in the range the node covers. Nodes that would
+    hold zero may be missing.
+    """
+    metric = models.CharField(max_length=20)
+    node = models.BigIntegerField()
+    collections = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'node'], name='leaderboard_node_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.node}] = {self.collections}"
+
+
+class ImageLink(models.Model):
+    """Last known status of an image URL, shared by every user who links it."""
+    OK = 'ok'
+    BROKEN = 'broken'  # The host says the image is gone
+    ERROR = 'error'  # Timed out or failed in a way worth retrying
+    STATUS_CHOICES = [(OK, 'OK'), (BROKEN, 'Broken'), (ERROR, 'Error')]
+
+    url_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of url, since url is unbounded
+    url = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # Last HTTP status, if any
+    checked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.url} ({self.status})"
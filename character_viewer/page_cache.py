@@ -0,0 +1,203 @@
+"""
+Cache of rendered list pages, keyed on the user's collection version.
+
+A cached page is only ever served for the same user, collection version and
+query parameters it was rendered for, so any upload, toggle, clear or bulk
+removal (which all bump the version) invalidates that user's pages without
+deleting anything. The CSRF token is rendered as a placeholder and filled in
+per request, since it depends on the browser rather than the collection.
+
+The same lookup gives browsers a validator: list pages carry an ETag (the
+page's cache key, the deploy and the browser's CSRF secret) and the
+collection's Last-Modified time, so a refresh of an unchanged page is
+answered 304 after the one version query, before any character is read.
+
+Hits and misses are counted in process memory and added to shared totals in
+the cache at most every STATS_FLUSH_INTERVAL seconds, so serving a page
+costs no extra cache writes.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .versions import collection_state
+
+# Rendered pages go stale by version bump, not by age; the timeout only
+# bounds how long superseded versions linger in the cache.
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Query parameters that select what a list page shows.
+PAGE_PARAMS = ('search', 'sort_by', 'page', 'cursor')
+
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+
+HITS_KEY = 'page_cache:hits'
+MISSES_KEY = 'page_cache:misses'
+
+# Seconds between adding this process's counts to the shared totals.
+STATS_FLUSH_INTERVAL = 30
+
+_unflushed = Counter()
+_unflushed_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _count(key):
+    global _last_flush
+    with _unflushed_lock:
+        _unflushed[key] += 1
+        if time.monotonic() - _last_flush < STATS_FLUSH_INTERVAL:
+            return
+    flush_page_cache_stats()
+
+
+def flush_page_cache_stats():
+    """Add this process's hit/miss counts to the shared totals."""
+    global _last_flush
+    with _unflushed_lock:
+        counts = dict(_unflushed)
+        _unflushed.clear()
+        _last_flush = time.monotonic()
+    for key, n in counts.items():
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, n)
+        except ValueError:
+            # Evicted between add() and incr(); losing these counts is fine
+            pass
+
+
+def page_cache_stats():
+    """Hit/miss counters for the rendered page cache, across processes."""
+    flush_page_cache_stats()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 3) if total else None,
+    }
+
+
+def page_cache_key(view_name, user, version, params):
+    selected = '&'.join(f'{name}={params.get(name, "")}' for name in PAGE_PARAMS)
+    digest = hashlib.md5(selected.encode('utf-8')).hexdigest()
+    return f'page:{view_name}:{user.pk}:{version}:{digest}'
+
+
+def page_etag(key, request):
+    # A new CSRF secret (e.g. after logging in again) invalidates the token
+    # embedded in the browser's copy, and a deploy its static file names.
+    # get_token() creates the secret now if the browser has none yet, as
+    # rendering the page would.
+    get_token(request)
+    csrf_secret = request.META['CSRF_COOKIE']
+    release = getattr(settings, 'RELEASE_ID', '')
+    digest = hashlib.sha256(f'{key}:{release}:{csrf_secret}'.encode('utf-8'))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def page_validators(request, view_name):
+    """
+    Return the page cache key, ETag and Last-Modified timestamp of
+    ``view_name``'s response to ``request``, from one collection query.
+    """
+    version, updated_at = collection_state(request.user)
+    key = page_cache_key(view_name, request.user, version, request.GET)
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    return key, page_etag(key, request), last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _respond(request, html, status):
+    response = HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+    response['X-Page-Cache'] = status
+    return response
+
+
+class _Uncacheable(Exception):
+    """Carries a response that did not come from render_list_page() out of get_or_set()."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def cache_rendered_page(view_func):
+    """
+    Serve GET requests for a list view from the page cache.
+
+    A request whose ``If-None-Match`` or ``If-Modified-Since`` still matches
+    gets a 304 without the view running. On a miss the view runs as usual and must return ``render_list_page()``
+    for its HTML to be stored under the key computed here. Concurrent misses
+    on one key run the view once; the cache backend's ``get_or_set()`` makes
+    the other requests wait for its result.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view_func(request, *args, **kwargs)
+
+        key, etag, last_modified = page_validators(request, view_func.__name__)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+
+        response = _cached_response(request, view_func, key, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+    return wrapper
+
+
+def _cached_response(request, view_func, key, *args, **kwargs):
+    """The view's response from the page cache, rendering it on a miss."""
+    rendered = []
+
+    def render_page():
+        request.page_cache_key = key
+        response = view_func(request, *args, **kwargs)
+        html = getattr(response, 'page_html', None)
+        if html is None:
+            raise _Uncacheable(response)
+        rendered.append(response)
+        return html
+
+    try:
+        html = cache.get_or_set(key, render_page, PAGE_CACHE_TIMEOUT)
+    except _Uncacheable as uncacheable:
+        _count(MISSES_KEY)
+        return uncacheable.response
+    if rendered:
+        _count(MISSES_KEY)
+        return rendered[0]
+    _count(HITS_KEY)
+    return _respond(request, html, 'HIT')
+
+
+def render_list_page(request, template_name, context):
+    """Render a list page, marking it for the page cache when the request allows."""
+    html = render_to_string(template_name, {**context, 'csrf_token': CSRF_PLACEHOLDER}, request)
+    if getattr(request, 'page_cache_key', None) is None:
+        return _respond(request, html, 'BYPASS')
+    response = _respond(request, html, 'MISS')
+    response.page_html = html
+    return response
@@ -0,0 +1,204 @@
+"""
+Keyset (cursor) pagination for the character list views.
+
+Next/previous links carry an opaque, signed cursor holding the sort column
+value and id of the row at the page boundary, so moving one page seeks
+straight to it through the (user, column, id) index instead of walking an
+OFFSET. Numbered jumps still use offsets, taken from whichever end of the
+list is closer. The total is counted once per request.
+"""
+from django.core import signing
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'character_viewer.pagination'
+ELLIPSIS = '…'
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Page numbers around ``number`` and at both ends, with ELLIPSIS gaps."""
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > 1 + on_each_side + on_ends + 1:
+        pages += list(range(1, on_ends + 1)) + [ELLIPSIS]
+        start = number - on_each_side
+    else:
+        start = 1
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages += list(range(start, number + on_each_side + 1))
+        pages += [ELLIPSIS] + list(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages += list(range(start, num_pages + 1))
+    return pages
+
+
+def encode_cursor(key, number, values, backwards):
+    return signing.dumps({'k': key, 'n': number, 'v': values, 'b': backwards},
+                         salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, key):
+    """Return the cursor payload, or None if it is missing, forged or stale."""
+    if not token:
+        return None
+    try:
+        state = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(state, dict) or state.get('k') != key:
+        return None
+    return state
+
+
+def seek(queryset, ordering, values, backwards=False):
+    """
+    Restrict ``queryset`` to rows strictly after ``values`` (a (column value,
+    id) pair) in ``ordering``, or strictly before them when ``backwards``.
+
+    The redundant ``<=``/``>=`` bound on the sort column is what lets the
+    database start an index range scan at the cursor position.
+    """
+    field = ordering[0]
+    column = field.lstrip('-')
+    descending = field.startswith('-') != backwards
+    value, pk = values
+    if descending:
+        return queryset.filter(
+            Q(**{f'{column}__lte': value}),
+            Q(**{f'{column}__lt': value}) | Q(id__lt=pk),
+        )
+    return queryset.filter(
+        Q(**{f'{column}__gte': value}),
+        Q(**{f'{column}__gt': value}) | Q(id__gt=pk),
+    )
+
+
+def iter_keyset(queryset, ordering, batch_size):
+    """
+    Yield every row of ``queryset`` in ``ordering``, ``batch_size`` rows per
+    query, each batch seeking past the last row of the one before. Only one
+    batch is held at a time, and no query stays open between batches.
+    """
+    column = ordering[0].lstrip('-')
+    batch = list(queryset.order_by(*ordering)[:batch_size])
+    while batch:
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last = batch[-1]
+        batch = list(seek(queryset, ordering, (getattr(last, column), last.id)).order_by(*ordering)[:batch_size])
+
+
+class KeysetPage:
+    """One page of a keyset-paginated list, iterable like a Django Page."""
+
+    ellipsis = ELLIPSIS
+
+    def __init__(self, object_list, number, per_page, count, ordering, key):
+        self.object_list = object_list
+        self.number = number
+        self.per_page = per_page
+        self.count = count
+        self.num_pages = max(1, -(-count // per_page))
+        self.ordering = ordering
+        self.key = key
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<KeysetPage {self.number} of {self.num_pages}>'
+
+    def has_next(self):
+        return self.number < self.num_pages and bool(self.object_list)
+
+    def has_previous(self):
+        return self.number > 1 and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.num_pages > 1
+
+    def _boundary(self, row):
+        return [getattr(row, self.ordering[0].lstrip('-')), row.id]
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return ''
+        return encode_cursor(self.key, self.number + 1, self._boundary(self.object_list[-1]), False)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return ''
+        return encode_cursor(self.key, self.number - 1, self._boundary(self.object_list[0]), True)
+
+    @cached_property
+    def page_range(self):
+        return elided_page_range(self.number, self.num_pages)
+
+
+def _page_number(page, num_pages):
+    try:
+        number = int(page)
+    except (TypeError, ValueError):
+        number = 1
+    return min(max(number, 1), num_pages)
+
+
+def _offset_page(queryset, ordering, number, per_page, count):
+    """Fetch page ``number`` by offset, counting from the nearer end."""
+    offset = (number - 1) * per_page
+    if offset <= count // 2:
+        return list(queryset.order_by(*ordering)[offset:offset + per_page])
+    on_page = min(per_page, count - offset)
+    from_end = count - offset - on_page
+    rows = list(queryset.order_by(*reverse_ordering(ordering))[from_end:from_end + on_page])
+    rows.reverse()
+    return rows
+
+
+def paginate(queryset, ordering, per_page, cursor=None, page=None, key=''):
+    """
+    Return a KeysetPage of ``queryset`` in ``ordering`` (a (column, id) pair).
+
+    A valid ``cursor`` seeks from the row it names; otherwise ``page`` is
+    used as a page number. ``key`` ties cursors to the sort and search they
+    were issued for, so a cursor from another listing falls back to paging.
+    """
+    count = queryset.count()
+    num_pages = max(1, -(-count // per_page))
+    state = decode_cursor(cursor, key)
+
+    rows = None
+    if state is not None:
+        number = _page_number(state.get('n'), num_pages)
+        try:
+            backwards = bool(state['b'])
+            seeking = seek(queryset, ordering, state['v'], backwards)
+        except (KeyError, TypeError, ValueError):
+            seeking = None
+        if seeking is not None:
+            if backwards:
+                rows = list(seeking.order_by(*reverse_ordering(ordering))[:per_page])
+                rows.reverse()
+            else:
+                rows = list(seeking.order_by(*ordering)[:per_page])
+        # The list changed underneath the cursor; fall back to the page number
+        if not rows:
+            rows = None
+    else:
+        number = _page_number(page, num_pages)
+
+    if rows is None:
+        rows = _offset_page(queryset, ordering, number, per_page, count) if count else []
+
+    return KeysetPage(rows, number, per_page, count, ordering, key)
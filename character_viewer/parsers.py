@@ -0,0 +1,211 @@
+"""
+Streaming parsers for uploaded character exports.
+
+Parsers take an iterable of byte chunks (such as ``UploadedFile.chunks()``)
+and yield one character dict at a time, so memory use is bounded by the chunk
+size plus a single row rather than by the size of the upload.
+"""
+import codecs
+import hashlib
+import json
+import re
+
+from .importer import ImportValidationError
+
+_WHITESPACE = ' \t\n\r'
+
+# Once this much of the buffer has been consumed it is trimmed, so the
+# buffer never holds more than about one chunk plus one partial value.
+_COMPACT_THRESHOLD = 64 * 1024
+
+# Longest single value (one character row, or a skipped top-level value) the
+# parser will buffer while waiting for it to complete.
+MAX_VALUE_CHARS = 1024 * 1024
+
+# One character line of a Mudae ``$mm`` paste, e.g.
+#   #810 - Tomo Aizawa · :bronzekey:  (2) 194 ka - https://mudae.net/uploads/...
+# The rank is missing for unranked characters and the image for some exports.
+MUDAE_LINE_RE = re.compile(
+    r'^(?:(?P<rank>#[\d,]+) - )?'
+    r'(?P<name>.+?)'
+    r'(?: · :(?P<key_type>[a-z]+)key:\s*\((?P<keys>\d+)\))?'
+    r' (?P<kakera>[\d,]+) ka'
+    r'(?: - (?P<image>\S+))?\s*$'
+)
+
+
+class _JSONStream:
+    """A decoded text buffer over byte chunks that refills on demand."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def _fill(self):
+        """Append the next chunk; return False once the input is exhausted."""
+        if self._exhausted:
+            return False
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._decoder.decode(b'', final=True)
+        self._exhausted = True
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def value(self):
+        """Decode one complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value is cut off at the end of the buffer;
+                # give up once it is longer than any sane row could be
+                if len(self._buffer) - self._pos < MAX_VALUE_CHARS and self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._exhausted and isinstance(value, (int, float)):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def at_end(self):
+        return self.peek() == ''
+
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_characters(chunks):
+    """
+    Yield each entry of the top-level ``characters`` array of a JSON export.
+
+    Other top-level keys are parsed and discarded. Malformed input raises
+    ``json.JSONDecodeError``; a document without a ``characters`` array raises
+    ImportValidationError.
+    """
+    stream = _JSONStream(chunks)
+    found = False
+
+    stream.expect('{')
+    if stream.peek() == '}':
+        stream.expect('}')
+    else:
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise stream.error('Expecting property name enclosed in double quotes')
+            stream.expect(':')
+
+            if key == 'characters' and stream.peek() == '[':
+                found = True
+                stream.expect('[')
+                if stream.peek() == ']':
+                    stream.expect(']')
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.peek() == ']':
+                            stream.expect(']')
+                            break
+                        stream.expect(',')
+            else:
+                stream.value()
+
+            if stream.peek() == '}':
+                stream.expect('}')
+                break
+            stream.expect(',')
+
+    if not stream.at_end():
+        raise stream.error('Extra data')
+    if not found:
+        raise ImportValidationError("the upload has no 'characters' list")
+
+
+def iter_text_lines(chunks):
+    """Yield decoded lines from byte chunks, without their line endings."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line[:-1] if line.endswith('\r') else line
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+def parse_mudae_line(line, match=MUDAE_LINE_RE.match):
+    """
+    Parse one ``$mm`` line into a character dict, or return None for header
+    and other non-character lines.
+    """
+    m = match(line)
+    if m is None:
+        return None
+    rank, name, key_type, keys, kakera, image = m.groups()
+    return {
+        'rank': rank or '',
+        'name': name,
+        'value': f"{kakera} ka",
+        'image': image or '',
+        'keys': int(keys) if keys else 0,
+        'key_type': key_type or '',
+    }
+
+
+def iter_mudae_characters(chunks):
+    """
+    Yield each character of a Mudae ``$mm`` text export in a single pass.
+
+    The summary header (``AVG:``, ``Top 15 value:``, ``Total value:``) and any
+    other lines that are not character entries are skipped.
+    """
+    for character in map(parse_mudae_line, iter_text_lines(chunks)):
+        if character is not None:
+            yield character
+
+
+def iter_upload_characters(uploaded_file):
+    """Pick the parser for an uploaded export by its file extension."""
+    if uploaded_file.name.lower().endswith('.txt'):
+        return iter_mudae_characters(uploaded_file.chunks())
+    return iter_json_characters(uploaded_file.chunks())
+
+
+def upload_digest(uploaded_file):
+    """SHA-256 of an uploaded file, read chunk by chunk."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,118 @@
+"""
+Outbound HTTP requests to URLs taken from user uploads.
+
+Image URLs come from user uploads, so fetching them as-is would let an
+upload point the server at itself or its private network (cloud metadata
+at 169.254.169.254, localhost, RFC 1918 hosts). ``open_public_url()`` only
+speaks http and https, and every connection, including each redirect hop,
+goes to an address checked to be public. The address is checked when the
+socket is opened, not in a separate lookup beforehand, so a DNS answer
+that changes between check and use (DNS rebinding) can't get around it.
+
+Environment proxies are not used, since the proxy's address would be the
+one checked.
+"""
+import http.client
+import ipaddress
+import socket
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+ALLOWED_SCHEMES = ('http', 'https')
+
+
+class BlockedURLError(urllib.error.URLError):
+    """Raised for a URL with another scheme, or a host that isn't a public address."""
+
+
+def allow_private_hosts():
+    """Local development and tests may fetch from private addresses."""
+    return getattr(settings, 'REMOTE_FETCH_ALLOW_PRIVATE_HOSTS', False)
+
+
+def is_public_address(address):
+    """Whether ``address`` (an IP string) is globally routable."""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_scheme(url):
+    scheme = urlparse(url).scheme.lower()
+    if scheme not in ALLOWED_SCHEMES:
+        raise BlockedURLError(f'{scheme or "missing"} URL scheme is not allowed')
+
+
+def _create_public_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """socket.create_connection(), refusing addresses that aren't public."""
+    host, port = address
+    error = None
+    for family, kind, proto, _, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        if not allow_private_hosts() and not is_public_address(sockaddr[0]):
+            error = BlockedURLError(f'{host} resolves to non-public address {sockaddr[0]}')
+            continue
+        sock = socket.socket(family, kind, proto)
+        try:
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+    raise error or OSError(f'{host} did not resolve')
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_public_connection
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_public_connection
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, request):
+        return self.do_open(_PublicHTTPConnection, request)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, request):
+        return self.do_open(_PublicHTTPSConnection, request, context=self._context)
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, request, fp, code, msg, headers, newurl):
+        check_scheme(newurl)
+        return super().redirect_request(request, fp, code, msg, headers, newurl)
+
+
+def _build_opener():
+    opener = urllib.request.OpenerDirector()
+    for handler in (_PublicHTTPHandler(), _PublicHTTPSHandler(), _RedirectHandler(),
+                    urllib.request.HTTPDefaultErrorHandler(), urllib.request.HTTPErrorProcessor(),
+                    urllib.request.UnknownHandler()):
+        opener.add_handler(handler)
+    return opener
+
+
+_opener = _build_opener()
+
+
+def open_public_url(request, timeout):
+    """
+    ``urllib.request.urlopen(request, timeout)`` limited to public http(s)
+    hosts. Raises BlockedURLError (a URLError, so an OSError) otherwise.
+    """
+    check_scheme(request.full_url)
+    return _opener.open(request, timeout=timeout)
@@ -0,0 +1,164 @@
+"""
+Substring search over character names and series.
+
+Matching keeps ``icontains`` semantics, but is served from an index so a
+search doesn't scan every row:
+
+- PostgreSQL: trigram GIN indexes (``pg_trgm``) on ``UPPER(name)`` and
+  ``UPPER(series)``, the expressions Django's ``icontains`` compares, so the
+  planner answers ``LIKE '%q%'`` from the indexes.
+- SQLite: an FTS5 table with the trigram tokenizer, ``character_search``,
+  holding each character's name, series and owner, kept in step with the
+  character table by triggers. Queries shorter than a trigram fall back to
+  ``LIKE``, as does an SQLite build without FTS5.
+
+Results are ranked by where the query matched (see ``search_rank()``), best
+first.
+"""
+from django.db import DatabaseError, connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'character_search'
+CHARACTER_TABLE = 'character_viewer_character'
+
+# Shortest query the trigram index can answer.
+MIN_TRIGRAM_LENGTH = 3
+
+POSTGRES_INDEXES = {
+    'char_name_trgm_idx': 'name',
+    'char_series_trgm_idx': 'series',
+}
+
+# Owner tokens are delimited so that user 1's never matches inside user 12's.
+OWNER_TOKEN = "'<' || {}.user_id || '>'"
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f'''
+        AFTER INSERT ON {CHARACTER_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, name, series, owner)
+            VALUES (new.id, new.name, new.series, {OWNER_TOKEN.format('new')});
+        END''',
+    f'{FTS_TABLE}_ad': f'''
+        AFTER DELETE ON {CHARACTER_TABLE} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END''',
+    f'{FTS_TABLE}_au': f'''
+        AFTER UPDATE OF name, series, user_id ON {CHARACTER_TABLE} BEGIN
+            UPDATE {FTS_TABLE} SET name = new.name, series = new.series, owner = {OWNER_TOKEN.format('new')}
+            WHERE rowid = old.id;
+        END''',
+}
+
+# Database aliases known to have the FTS table; absence is re-checked, since
+# migrations may create it after the first search.
+_fts_ready = set()
+
+
+def _sqlite_supports_trigram_fts(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+    except DatabaseError:
+        return False
+    cursor.execute('DROP TABLE temp.fts_probe')
+    return True
+
+
+def install_search_index(connection):
+    """
+    Create the search index on ``connection`` if it is missing. Idempotent.
+
+    On SQLite this also restores the sync triggers, which Django drops when
+    a migration rebuilds the character table, and reindexes every row when
+    it had to.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for index, column in POSTGRES_INDEXES.items():
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index} ON {CHARACTER_TABLE} '
+                    f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+                )
+        elif connection.vendor == 'sqlite':
+            if not _sqlite_supports_trigram_fts(cursor):
+                return
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                           [f'{FTS_TABLE}%'])
+            existing = {row[0] for row in cursor.fetchall()}
+            if FTS_TABLE in existing and existing.issuperset(SQLITE_TRIGGERS):
+                return
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, series, owner, tokenize='trigram')"
+            )
+            for trigger, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger} {body}')
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, series, owner) '
+                f'SELECT id, name, series, {OWNER_TOKEN.format(CHARACTER_TABLE)} FROM {CHARACTER_TABLE}'
+            )
+
+
+def restore_search_index(using, **kwargs):
+    """post_migrate handler: put back SQLite sync triggers a table rebuild dropped."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
+
+
+def drop_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for index in POSTGRES_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        elif connection.vendor == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _fts_ready.discard(connection.alias)
+
+
+def _has_fts_table(connection):
+    if connection.alias not in _fts_ready:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            if cursor.fetchone() is None:
+                return False
+        _fts_ready.add(connection.alias)
+    return True
+
+
+def search_rank(query):
+    """
+    Relevance of a matching row, lower is better: an exact name, then a name
+    starting with the query, then one containing it, then the same for the
+    series.
+    """
+    return Case(
+        When(name__iexact=query, then=Value(0)),
+        When(name__istartswith=query, then=Value(1)),
+        When(name__icontains=query, then=Value(2)),
+        When(series__iexact=query, then=Value(3)),
+        When(series__istartswith=query, then=Value(4)),
+        default=Value(5),
+        output_field=IntegerField(),
+    )
+
+
+def search_characters(queryset, user, query):
+    """
+    Narrow ``queryset`` (``user``'s characters) to those whose name or series
+    contains ``query``, annotated with ``search_rank``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'sqlite' and len(query) >= MIN_TRIGRAM_LENGTH and _has_fts_table(connection):
+        # Quoted FTS5 strings match as substrings under the trigram
+        # tokenizer; matching the owner too keeps other users' hits for a
+        # common term from being read at all
+        phrase = '"%s"' % query.replace('"', '""')
+        expression = f'owner:"<{user.pk}>" AND {{name series}}:{phrase}'
+        matches = Q(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]))
+    else:
+        matches = Q(name__icontains=query) | Q(series__icontains=query)
+    return queryset.filter(matches).annotate(search_rank=search_rank(query))
@@ -0,0 +1,228 @@
+// Character viewer page. Endpoint URLs come from data attributes on <body>.
+
+// Search, sort and paging fetch card fragments from the rows endpoint
+// (data-rows-url) instead of navigating: results update as the user types
+// and the next page is appended when the end of the grid scrolls into view.
+// Without IntersectionObserver the page keeps its pagination links.
+const SEARCH_DEBOUNCE_MS = 250;
+let liveRows = false;
+let rowsController = null;  // The request in flight, aborted when superseded
+let rowsGeneration = 0;  // Bumped per new listing, so stale responses are dropped
+let nextCursor = '';
+let searchTimer = null;
+let endOfGridVisible = false;
+
+function listingParams(keepSort) {
+    const searchQuery = document.getElementById('search-input').value.trim();
+    const sortBy = document.getElementById('sort-select').value;
+    const params = new URLSearchParams();
+    if (searchQuery) {
+        params.set('search', searchQuery);
+    }
+    // A new search is ranked by relevance unless another sort was picked
+    if (keepSort ? (sortBy !== 'relevance' || searchQuery) : (sortBy !== 'default' && sortBy !== 'relevance')) {
+        params.set('sort_by', sortBy);
+    }
+    return params;
+}
+
+function updateSort() {
+    if (liveRows) {
+        loadRows(false, true);
+    } else {
+        window.location.href = `?${listingParams(true)}`;
+    }
+}
+
+function performSearch() {
+    if (liveRows) {
+        loadRows(false, false);
+    } else {
+        window.location.href = `?${listingParams(false)}`;
+    }
+}
+
+function renderSortOptions(sortBy, searching) {
+    const select = document.getElementById('sort-select');
+    let relevance = select.querySelector('option[value="relevance"]');
+    if (searching && !relevance) {
+        relevance = new Option('Relevance', 'relevance');
+        select.insertBefore(relevance, select.firstChild);
+    } else if (!searching && relevance) {
+        relevance.remove();
+    }
+    select.value = sortBy;
+}
+
+function renderRowsStatus(shown, count) {
+    const status = document.getElementById('rows-status');
+    status.textContent = count ? `Showing ${shown} of ${count} characters` : 'No characters match your search.';
+    status.hidden = false;
+}
+
+function loadRows(append, keepSort) {
+    if (append && (rowsController || !nextCursor)) {
+        return;
+    }
+    const params = listingParams(keepSort);
+    if (append) {
+        params.set('cursor', nextCursor);
+    } else {
+        clearTimeout(searchTimer);
+        if (rowsController) {
+            rowsController.abort();
+        }
+        rowsGeneration += 1;
+        history.replaceState(null, '', `?${params}`);
+        document.querySelectorAll('.export-link').forEach(link => {
+            link.search = params.toString();
+        });
+    }
+    const generation = rowsGeneration;
+    const controller = new AbortController();
+    rowsController = controller;
+
+    fetch(`${document.body.dataset.rowsUrl}?${params}`, {signal: controller.signal})
+    .then(response => response.json())
+    .then(data => {
+        if (generation !== rowsGeneration) {
+            return;
+        }
+        if (data.status !== 'success') {
+            throw new Error(data.message);
+        }
+        const grid = document.getElementById('character-grid');
+        if (append) {
+            grid.insertAdjacentHTML('beforeend', data.html);
+        } else {
+            grid.innerHTML = data.html;
+            window.scrollTo({top: grid.offsetTop - 20});
+        }
+        nextCursor = data.next_cursor || '';
+        renderSortOptions(data.sort_by, params.has('search'));
+        renderRowsStatus(grid.querySelectorAll('.character-card').length, data.count);
+    })
+    .catch(error => {
+        if (error.name !== 'AbortError') {
+            console.error('Error:', error);
+        }
+    })
+    .finally(() => {
+        if (rowsController === controller) {
+            rowsController = null;
+            // The observer only reports changes, so keep filling a short page
+            if (endOfGridVisible && generation === rowsGeneration) {
+                loadRows(true, true);
+            }
+        }
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const grid = document.getElementById('character-grid');
+    if (!grid || !('IntersectionObserver' in window)) {
+        return;
+    }
+    liveRows = true;
+    document.body.classList.add('live-rows');
+    nextCursor = grid.dataset.nextCursor;
+    renderRowsStatus(grid.querySelectorAll('.character-card').length, Number(grid.dataset.count));
+
+    document.getElementById('search-input').addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadRows(false, false), SEARCH_DEBOUNCE_MS);
+    });
+    new IntersectionObserver(entries => {
+        endOfGridVisible = entries[0].isIntersecting;
+        if (endOfGridVisible) {
+            loadRows(true, true);
+        }
+    }, {rootMargin: '400px'}).observe(document.getElementById('rows-status'));
+});
+
+// Clicks are coalesced: toggles are counted per character and sent as
+// one batch once clicking pauses, so a double click cancels out.
+const TOGGLE_DELAY_MS = 400;
+const pendingToggles = new Map();
+let toggleTimer = null;
+
+function renderTradeButton(element, inTradeList) {
+    element.textContent = inTradeList ? '✓ Traded' : '+ Trade';
+    element.style.backgroundColor = inTradeList ? '#e74c3c' : '#27ae60';
+}
+
+function toggleTradeList(characterId, element) {
+    renderTradeButton(element, !element.textContent.startsWith('✓'));
+    const pending = pendingToggles.get(characterId) || {element: element, count: 0};
+    pending.count += 1;
+    pendingToggles.set(characterId, pending);
+    clearTimeout(toggleTimer);
+    toggleTimer = setTimeout(flushTradeToggles, TOGGLE_DELAY_MS);
+}
+
+function flushTradeToggles() {
+    const batch = new Map([...pendingToggles].filter(([id, pending]) => pending.count % 2 === 1));
+    pendingToggles.clear();
+    if (batch.size === 0) {
+        return;
+    }
+
+    fetch(document.body.dataset.batchUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+        },
+        body: JSON.stringify({operation: 'toggle', character_ids: [...batch.keys()]})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status !== 'success') {
+            throw new Error(data.message);
+        }
+        // Trust the server's states over the optimistic ones
+        batch.forEach((pending, id) => {
+            if (!pendingToggles.has(id) && String(id) in data.in_trade_list) {
+                renderTradeButton(pending.element, data.in_trade_list[id]);
+            }
+        });
+        if (batch.size === 1) {
+            const [[id, pending]] = [...batch];
+            const name = pending.element.dataset.name;
+            showNotification(`${name} ${data.in_trade_list[id] ? 'added to' : 'removed from'} trade list`);
+        } else {
+            showNotification(`Updated ${data.updated} characters in trade list`);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        batch.forEach(pending => {
+            renderTradeButton(pending.element, !pending.element.textContent.startsWith('✓'));
+        });
+    });
+}
+
+function clearAllData() {
+    if (confirm('Are you sure you want to clear all character data? This will delete all currently loaded characters.')) {
+        const csrftoken = getCookie('csrftoken');
+
+        fetch(document.body.dataset.clearUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': csrftoken
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                // Reload the page after successful deletion
+                window.location.href = document.body.dataset.pageUrl;
+            } else {
+                console.error('Error clearing data');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+}
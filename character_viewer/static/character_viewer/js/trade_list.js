@@ -0,0 +1,145 @@
+// Trade list page. Endpoint URLs come from data attributes on <body>.
+
+// html2canvas is only needed for "Download as Image", so it is fetched on
+// the first click instead of with every page view.
+const HTML2CANVAS_URL = 'https://html2canvas.hertzen.com/dist/html2canvas.min.js';
+let html2canvasLoading = null;
+
+function loadHtml2canvas() {
+    if (!html2canvasLoading) {
+        html2canvasLoading = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = HTML2CANVAS_URL;
+            script.onload = () => resolve(window.html2canvas);
+            script.onerror = () => {
+                html2canvasLoading = null;
+                reject(new Error('Could not load html2canvas'));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return html2canvasLoading;
+}
+
+function downloadPageAsImage() {
+    // Show a notification that the image is being prepared
+    showNotification("Preparing image download...");
+
+    // Temporarily adjust image heights for the capture
+    const characterImages = document.querySelectorAll('.character-image');
+    const originalHeights = [];
+
+    // Store original heights and set new height for capture
+    characterImages.forEach(img => {
+        originalHeights.push(img.style.height);
+        img.style.height = '250px';
+    });
+
+    // Select the container to capture
+    const container = document.querySelector('.container');
+
+    loadHtml2canvas().then(html2canvas => html2canvas(container, {
+        backgroundColor: '#2F3136', // Match the container background
+        scale: 2, // Higher resolution
+        useCORS: true, // Handle cross-origin images
+        allowTaint: true
+    })).then(canvas => {
+        // Restore original image heights after capture
+        characterImages.forEach((img, index) => {
+            img.style.height = originalHeights[index];
+        });
+
+        // Create a temporary link to download the image
+        const link = document.createElement('a');
+        link.download = 'trade-list-page.png';
+        link.href = canvas.toDataURL('image/png');
+        link.click();
+
+        showNotification("Image downloaded successfully!");
+    }).catch(err => {
+        // Restore original image heights in case of error
+        characterImages.forEach((img, index) => {
+            img.style.height = originalHeights[index];
+        });
+
+        console.error('Error generating image:', err);
+        showNotification("Error generating image: " + err.message);
+    });
+}
+
+function toggleTradeList(characterId, element) {
+    const csrftoken = getCookie('csrftoken');
+
+    fetch(document.body.dataset.toggleUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': csrftoken
+        },
+        body: `character_id=${characterId}`
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            if (data.in_trade_list === false) {
+                // Character was successfully removed from trade list
+                showNotification(`${data.character_name} removed from trade list`);
+                // Remove the card from the page
+                element.closest('.character-card').remove();
+            } else {
+                // Character was added to trade list (shouldn't happen from trade list page)
+                // But just in case, update the UI
+                showNotification(`${data.character_name} added to trade list`);
+            }
+        } else {
+            console.error('Error:', data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+    });
+}
+
+function performSearch() {
+    const searchQuery = document.getElementById('search-input').value;
+    if (searchQuery) {
+        window.location.href = `?search=${encodeURIComponent(searchQuery)}`;
+    } else {
+        window.location.href = '?';
+    }
+}
+
+function removeAllFromTradeList() {
+    if (confirm('Are you sure you want to remove all characters from the trade list?')) {
+        const csrftoken = getCookie('csrftoken');
+
+        fetch(document.body.dataset.removeAllUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': csrftoken
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                // Reload the page after successful removal
+                window.location.href = document.body.dataset.pageUrl;
+            } else {
+                console.error('Error removing all from trade list');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+        });
+    }
+}
+
+function updateTradeListSort() {
+    const sortBy = document.getElementById('trade-list-sort-select').value;
+    const searchQuery = document.getElementById('search-input').value;
+    let url = `?sort_by=${sortBy}`;
+    if (searchQuery) {
+        url += `&search=${encodeURIComponent(searchQuery)}`;
+    }
+    window.location.href = url;
+}
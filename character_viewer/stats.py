@@ -0,0 +1,99 @@
+"""
+Precomputed collection statistics: the figures a Mudae ``$mm`` paste opens
+with (average, top 15 and total value), plus key and trade-list counts.
+
+Aggregating on every page view would scan the user's characters, so the
+figures live in one CollectionStats row per user instead. An import
+recomputes the row from the typed ``kakera``/``keys`` columns; trade-list
+changes and clears adjust it in place. Pages read it with a single lookup.
+Imports and clears also move the collection on the leaderboard.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .leaderboard import leaderboard_scores, move_collection
+from .models import Character, CollectionStats
+
+
+@transaction.atomic
+def recompute_stats(user):
+    """Rebuild ``user``'s stats from their characters, and their leaderboard place, and return them."""
+    # Row lock: a concurrent update can't change the scores moved out of the leaderboard
+    before = leaderboard_scores(CollectionStats.objects.select_for_update().filter(user=user).first())
+    characters = Character.objects.filter(user=user)
+    totals = characters.aggregate(
+        count=Count('id'), value=Sum('kakera'),
+        trade_count=Count('id', filter=Q(in_trade_list=True)),
+        trade_value=Sum('kakera', filter=Q(in_trade_list=True)),
+    )
+    # Served by the (user, -kakera, -id) index, so only the top rows are read
+    top = characters.order_by('-kakera', '-id').values_list('kakera', flat=True)[:CollectionStats.TOP_VALUE_COUNT]
+    keys = (characters.filter(keys__gt=0).exclude(key_type='')
+            .values('key_type').annotate(holders=Count('id'), total=Sum('keys'))
+            .values_list('key_type', 'holders', 'total'))
+    keys = {key_type: {'characters': holders, 'keys': total} for key_type, holders, total in keys}
+    stats, _ = CollectionStats.objects.update_or_create(user=user, defaults={
+        'characters': totals['count'],
+        'total_kakera': totals['value'] or 0,
+        'top_kakera': sum(top),
+        'keys': keys,
+        'total_keys': sum(held['keys'] for held in keys.values()),
+        'trade_characters': totals['trade_count'],
+        'trade_kakera': totals['trade_value'] or 0,
+    })
+    move_collection(before, leaderboard_scores(stats))
+    return stats
+
+
+def adjust_trade_stats(user, characters, kakera):
+    """Record ``characters`` worth ``kakera`` joining (or, if negative, leaving) the trade list."""
+    CollectionStats.objects.filter(user=user).update(
+        trade_characters=F('trade_characters') + characters,
+        trade_kakera=F('trade_kakera') + kakera,
+    )
+
+
+def refresh_trade_stats(user):
+    """Recount ``user``'s trade list, through its partial indexes, after a batch change."""
+    totals = Character.objects.filter(user=user, in_trade_list=True).aggregate(count=Count('id'), value=Sum('kakera'))
+    CollectionStats.objects.filter(user=user).update(trade_characters=totals['count'], trade_kakera=totals['value'] or 0)
+
+
+def reset_trade_stats(user):
+    CollectionStats.objects.filter(user=user).update(trade_characters=0, trade_kakera=0)
+
+
+@transaction.atomic
+def clear_stats(user):
+    before = leaderboard_scores(CollectionStats.objects.select_for_update().filter(user=user).first())
+    CollectionStats.objects.filter(user=user).update(
+        characters=0, total_kakera=0, top_kakera=0, keys={}, total_keys=0, trade_characters=0, trade_kakera=0,
+    )
+    move_collection(before, None)
+
+
+def reconcile_stats():
+    """
+    Check every user's stats against their characters and recompute those
+    that disagree, or are missing. Returns ``(checked, corrected)``.
+    """
+    actual = (Character.objects.exclude(user=None).values('user')
+              .annotate(count=Count('id'), value=Sum('kakera'), keys=Sum('keys', filter=~Q(key_type='')))
+              .values_list('user', 'count', 'value', 'keys'))
+    actual = {user_id: (count, value or 0, keys or 0) for user_id, count, value, keys in actual.iterator()}
+    stored = {
+        user_id: totals for user_id, *totals in
+        CollectionStats.objects.values_list('user', 'characters', 'total_kakera', 'total_keys').iterator()
+    }
+    stale = [user_id for user_id in actual.keys() | stored.keys()
+             if actual.get(user_id, (0, 0, 0)) != tuple(stored.get(user_id, (0, 0, 0)))]
+    for user in User.objects.filter(id__in=stale):
+        recompute_stats(user)
+    return len(actual.keys() | stored.keys()), len(stale)
+
+
+def collection_stats(user):
+    """``user``'s stats, or empty ones before their first import."""
+    return CollectionStats.objects.filter(user=user).first() or CollectionStats(user=user)
+
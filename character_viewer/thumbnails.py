@@ -0,0 +1,235 @@
+"""
+Thumbnail proxy for character images.
+
+List pages link to ``/thumbnails/<token>/``, where the token is the signed
+source URL, so the proxy only ever fetches URLs this app emitted. Each source
+is fetched once and downsized to a WebP thumbnail stored under the hash of
+its content, so duplicate images share a file. A small per-URL pointer file
+maps the source URL to that hash. The cache directory is bounded by
+``THUMBNAIL_CACHE_MAX_BYTES``; hits refresh a file's mtime and the least
+recently used files are evicted first. A running total of the bytes written
+means a miss only walks the cache directory when it may be over the limit.
+Sources are fetched through
+``remote.open_public_url``, so only public http(s) hosts are reachable.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+from .remote import open_public_url
+
+THUMBNAIL_SALT = 'character_viewer.thumbnails'
+
+# Thumbnails fit within this box, about twice a list card's size for HiDPI
+# screens. Part of the cache key, so changing it regenerates every file.
+THUMBNAIL_SIZE = (300, 450)
+THUMBNAIL_QUALITY = 80
+
+# Limits on fetching a source image.
+FETCH_TIMEOUT = 10
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# Decoded size limit, checked from the header before any pixels are read.
+# A small, highly compressed file can still decode to gigabytes.
+MAX_SOURCE_PIXELS = 25_000_000
+USER_AGENT = 'mudae-viewer-thumbnailer/1.0'
+
+# The running size total only counts this process's writes, so the cache is
+# rescanned at least this often (seconds) to pick up other workers' files.
+RESCAN_INTERVAL = 300
+
+# Size of the cache at the last scan plus bytes written since:
+# {'root': ..., 'bytes': ..., 'scanned_at': ...}.
+_size = {}
+_size_lock = threading.Lock()
+
+
+class ThumbnailError(Exception):
+    """Raised when a source image cannot be fetched or decoded."""
+
+
+def cache_root():
+    return getattr(settings, 'THUMBNAIL_ROOT', os.path.join(tempfile.gettempdir(), 'mudae_thumbnails'))
+
+
+def max_cache_bytes():
+    return getattr(settings, 'THUMBNAIL_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+
+
+def thumbnail_url(image_url):
+    """Proxy URL for ``image_url``'s thumbnail, or '' if it is not remote."""
+    if not image_url.startswith(('http://', 'https://')):
+        return ''
+    # Untimestamped, so an image keeps one URL and browsers can cache it
+    token = signing.Signer(salt=THUMBNAIL_SALT).sign_object(image_url, compress=True)
+    return reverse('thumbnail', args=[token])
+
+
+def source_url(token):
+    """The image URL signed into ``token``, or None if it is invalid."""
+    try:
+        return signing.Signer(salt=THUMBNAIL_SALT).unsign_object(token)
+    except signing.BadSignature:
+        return None
+
+
+def _url_key(url):
+    variant = f'{THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]}q{THUMBNAIL_QUALITY}'
+    return hashlib.sha256(f'{variant}:{url}'.encode('utf-8')).hexdigest()
+
+
+def _blob_path(digest):
+    return os.path.join(cache_root(), 'blobs', digest[:2], f'{digest}.webp')
+
+
+def _pointer_path(url):
+    key = _url_key(url)
+    return os.path.join(cache_root(), 'urls', key[:2], key)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def fetch_source(url):
+    """Download ``url``, refusing bodies over MAX_SOURCE_BYTES."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    try:
+        with open_public_url(request, timeout=FETCH_TIMEOUT) as response:
+            data = response.read(MAX_SOURCE_BYTES + 1)
+    except (OSError, ValueError) as e:
+        raise ThumbnailError(f"Could not fetch {url}: {e}")
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ThumbnailError(f"{url} is larger than {MAX_SOURCE_BYTES} bytes")
+    return data
+
+
+def make_thumbnail(data):
+    """Downsize image bytes to a WebP thumbnail within THUMBNAIL_SIZE."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                raise ThumbnailError(f"Image is {image.width}x{image.height}, over {MAX_SOURCE_PIXELS} pixels")
+            # JPEGs decode straight to a reduced scale, no smaller than twice the box
+            image.draft('RGB', (THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2))
+            # First frame of animated GIFs; keep transparency
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+            image.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS, reducing_gap=2.0)
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        raise ThumbnailError(f"Could not decode image: {e}")
+    return output.getvalue()
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def cached_thumbnail(url):
+    """Path of ``url``'s cached thumbnail, or None on a miss."""
+    try:
+        with open(_pointer_path(url)) as pointer:
+            digest = pointer.read().strip()
+    except OSError:
+        return None
+    path = _blob_path(digest)
+    if not os.path.exists(path):
+        return None
+    _touch(path)
+    _touch(_pointer_path(url))
+    return path
+
+
+def get_thumbnail(url):
+    """
+    Return the path of ``url``'s thumbnail, fetching and caching it on a miss.
+
+    Raises ThumbnailError if the source cannot be fetched or decoded.
+    """
+    path = cached_thumbnail(url)
+    if path is not None:
+        return path
+
+    source = fetch_source(url)
+    digest = hashlib.sha256(source).hexdigest()
+    path = _blob_path(digest)
+    written = len(digest)
+    if os.path.exists(path):
+        _touch(path)
+    else:
+        thumbnail = make_thumbnail(source)
+        _write_atomic(path, thumbnail)
+        written += len(thumbnail)
+    _write_atomic(_pointer_path(url), digest.encode('ascii'))
+    if _record_write(written):
+        evict(keep=path)
+    return path
+
+
+def _record_write(nbytes):
+    """Add ``nbytes`` to the running size total; True if the cache should be scanned."""
+    with _size_lock:
+        if _size.get('root') != cache_root():
+            return True
+        _size['bytes'] += nbytes
+        return (_size['bytes'] > max_cache_bytes()
+                or time.monotonic() - _size['scanned_at'] > RESCAN_INTERVAL)
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Delete least recently used cache files until the cache fits ``max_bytes``,
+    and reset the running size total to what is left.
+
+    ``keep`` (the file just written) is never deleted. Returns the number of
+    bytes freed.
+    """
+    max_bytes = max_cache_bytes() if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for directory, _, names in os.walk(cache_root()):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    freed = 0
+    if total > max_bytes:
+        for _, size, path in sorted(entries):
+            if total - freed <= max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            freed += size
+    with _size_lock:
+        _size.update(root=cache_root(), bytes=total - freed, scanned_at=time.monotonic())
+    return freed
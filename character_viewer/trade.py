@@ -0,0 +1,86 @@
+"""
+Batch changes to a user's trade list.
+
+Each operation is a single conditional UPDATE over either an explicit list of
+character ids or a filter, so marking hundreds of characters costs one
+statement instead of a fetch and a full-row save per character.
+"""
+from django.db.models import Case, Value, When
+
+from .models import Character
+
+# Most ids accepted in one batch; the front end sends far fewer.
+MAX_BATCH_IDS = 1000
+
+OPERATIONS = ('add', 'remove', 'toggle')
+
+# Filter names accepted from clients, mapped to queryset lookups.
+TRADE_FILTERS = {
+    'keys': 'keys',
+    'kakera_lt': 'kakera__lt',
+}
+
+
+class TradeRequestError(ValueError):
+    """Raised when a batch trade-list request is malformed."""
+
+
+def _integer(value):
+    """``value`` if it is an int (not a bool), a string of ASCII digits as an int, else None."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+def _trade_value(operation):
+    if operation == 'add':
+        return Value(True)
+    if operation == 'remove':
+        return Value(False)
+    return Case(When(in_trade_list=True, then=Value(False)), default=Value(True))
+
+
+def _selection(user, operation, character_ids=None, filters=None):
+    if operation not in OPERATIONS:
+        raise TradeRequestError(f"Unknown operation {operation!r}")
+    if (character_ids is None) == (filters is None):
+        raise TradeRequestError("Give either character_ids or filter")
+
+    characters = Character.objects.filter(user=user)
+    if character_ids is not None:
+        if not isinstance(character_ids, list) or len(character_ids) > MAX_BATCH_IDS:
+            raise TradeRequestError(f"character_ids must be a list of at most {MAX_BATCH_IDS} ids")
+        ids = {_integer(character_id) for character_id in character_ids}
+        if None in ids:
+            raise TradeRequestError("character_ids must be integers")
+        return characters.filter(id__in=ids)
+
+    if not isinstance(filters, dict) or not filters:
+        raise TradeRequestError("filter must be a non-empty object")
+    lookups = {}
+    for name, value in filters.items():
+        if name not in TRADE_FILTERS:
+            raise TradeRequestError(f"Unknown filter {name!r}")
+        lookups[TRADE_FILTERS[name]] = _integer(value)
+        if lookups[TRADE_FILTERS[name]] is None:
+            raise TradeRequestError(f"Filter {name!r} needs an integer")
+    return characters.filter(**lookups)
+
+
+def apply_trade_operation(user, operation, character_ids=None, filters=None):
+    """
+    Add, remove or toggle the selected characters in ``user``'s trade list.
+
+    Exactly one of ``character_ids`` (a list of ids) or ``filters`` (a dict
+    of TRADE_FILTERS names to integers) selects the characters. Add and
+    remove skip rows that are already in the target state. Returns the
+    number of rows changed.
+    """
+    characters = _selection(user, operation, character_ids, filters)
+    if operation == 'add':
+        characters = characters.filter(in_trade_list=False)
+    elif operation == 'remove':
+        characters = characters.filter(in_trade_list=True)
+    return characters.update(in_trade_list=_trade_value(operation))
@@ -1,14 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from .views.api import api_characters, api_trade_list
+from .views.export import export_collection, export_trade_list
 from .views.health import health_check
+from .views.leaderboard import leaderboard
+from .views.media import character_image
+from .views.rows import character_rows
+from .views.thumbnails import thumbnail
 
 urlpatterns = [
     path('', views.upload_and_view, name='upload_and_view'),
+    path('rows/', character_rows, name='character_rows'),
+    path('export/<slug:export_format>/', export_collection, name='export_collection'),
     path('trade_list/', views.trade_list, name='trade_list'),
+    path('trade_list/export/<slug:export_format>/', export_trade_list, name='export_trade_list'),
+    path('leaderboard/', leaderboard, name='leaderboard'),
     path('toggle_trade_list/', views.toggle_trade_list, name='toggle_trade_list'),
+    path('trade_list/batch/', views.batch_trade_list, name='batch_trade_list'),
     path('clear_all/', views.clear_all, name='clear_all'),
     path('remove_all_from_trade_list/', views.remove_all_from_trade_list, name='remove_all_from_trade_list'),
     path('create-admin/', views.temp_create_admin, name='temp_create_admin'),  # Temporary - remove after setup
     path('register/', views.register, name='register'),
     path('health/', health_check, name='health_check'),
+    # Images from zip uploads; in production static() serves no media
+    path(f"{settings.MEDIA_URL.lstrip('/')}characters/<path:name>", character_image, name='character_image'),
+    path('thumbnails/<str:token>/', thumbnail, name='thumbnail'),
+    path('api/characters/', api_characters, name='api_characters'),
+    path('api/trade_list/', api_trade_list, name='api_trade_list'),
 ]
\ No newline at end of file
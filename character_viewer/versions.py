@@ -0,0 +1,36 @@
+"""
+Per-user collection version counter.
+
+Every view that changes a user's characters bumps the version, so anything
+derived from the collection (rendered pages, API responses) can be keyed on
+it and is invalidated implicitly by the next mutation.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Collection
+
+
+def collection_version(user):
+    """Return ``user``'s current collection version (0 before any upload)."""
+    return collection_state(user)[0]
+
+
+def collection_state(user):
+    """
+    Return ``(version, updated_at)`` for ``user``'s collection in one query.
+
+    ``updated_at`` is when the version was last bumped, or None before any
+    upload.
+    """
+    state = Collection.objects.filter(user=user).values_list('version', 'updated_at').first()
+    return state or (0, None)
+
+
+def bump_collection_version(user):
+    """Invalidate everything derived from ``user``'s collection."""
+    updated = Collection.objects.filter(user=user).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        Collection.objects.get_or_create(user=user, defaults={'version': 1})
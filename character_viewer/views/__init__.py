@@ -1,215 +1,201 @@
 import json
-import zipfile
 import os
-import shutil
 from django.shortcuts import render, redirect
-from django.core.paginator import Paginator
 from django.conf import settings
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
-from .models import Character
+from ..models import Character, Collection
+from ..importer import import_characters, ImportValidationError
+from ..parsers import iter_upload_characters, upload_digest
+from ..fragments import attach_cards
+from ..linkcheck import check_user_links_in_background
+from ..listing import character_queryset, get_sort_by, listing_query, paginate_characters
+from ..page_cache import cache_rendered_page, render_list_page
+from ..stats import adjust_trade_stats, clear_stats, collection_stats, refresh_trade_stats, reset_trade_stats
+from ..trade import TradeRequestError, apply_trade_operation
+from ..versions import bump_collection_version
+from ..zip_import import ZipImportError, import_zip
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 
 @login_required
+@cache_rendered_page
 def upload_and_view(request):
     characters = []
-    paginator = None
     page_obj = None
     error_message = None
+    import_result = None
     
     # Handle uploaded JSON file
     if request.method == 'POST' and request.FILES.get('json_file'):
         uploaded_file = request.FILES['json_file']
         
         try:
-            # Process the uploaded JSON file directly
-            # Read the file content
-            file_content = uploaded_file.read().decode('utf-8')
-            data = json.loads(file_content)
-                    
-            # Clear existing characters for current user
-            Character.objects.filter(user=request.user).delete()
-            
-            # Save new characters to database with sort_order
-            sort_order = 0
-            for char_data in data['characters']:
-                # The image field in the JSON should already contain the full URL
-                image_url = char_data.get('image', '')
-                # Keep the image URL as is (whether it's from cdn.imgchest.com, imgur, or mudae.net)
-                
-                Character.objects.create(
-                    user=request.user,
-                    rank=char_data.get('rank', ''),
-                    name=char_data.get('name', ''),
-                    series=char_data.get('series', ''),  # This field might not be in the JSON, so it defaults to empty string
-                    value=char_data.get('value', ''),
-                    note=char_data.get('note', ''),
-                    image=image_url,  # Store the full image URL as provided in the JSON
-                    sort_order=sort_order,  # Add the order in which they appear in the JSON
-                    in_trade_list=False,  # Initialize to not in trade list
-                    keys=char_data.get('keys', 0),  # Number of keys for the character
-                    key_type=char_data.get('key_type', ''),  # Type of key (bronze, silver, gold, chaos)
+            # Stream characters straight from the uploaded chunks (JSON export
+            # or Mudae $mm text paste) into the importer, which validates them
+            # and applies only the differences in batches inside a single
+            # transaction. Re-uploading an identical file is a no-op.
+            if uploaded_file.name.lower().endswith('.zip'):
+                # data.json plus images, stored by content hash in media
+                import_result = import_zip(
+                    request.user, uploaded_file, content_hash=upload_digest(uploaded_file)
+                )
+            else:
+                rows = iter_upload_characters(uploaded_file)
+                import_result = import_characters(
+                    request.user, rows, content_hash=upload_digest(uploaded_file)
                 )
-                sort_order += 1
+            if not import_result.skipped and getattr(settings, 'IMAGE_CHECK_AFTER_IMPORT', False):
+                check_user_links_in_background(request.user)
         except json.JSONDecodeError:
             # Handle invalid JSON file
             error_message = "Invalid JSON file format"
+        except ImportValidationError as e:
+            # Reject the whole upload; the existing collection is untouched
+            error_message = f"Invalid character data: {e}"
+        except ZipImportError as e:
+            error_message = f"Invalid zip file: {e}"
         except Exception as e:
             # Handle any other errors during upload processing
             error_message = f"Error processing uploaded file: {str(e)}"
-        
-        # If there was an error, we should handle it appropriately
-        if 'error_message' in locals() and error_message:
-            # For now, just continue to show the page but with error handling
-            # In the future, you might want to show the error differently
-            pass
     
     # Handle search
     search_query = request.GET.get('search', '')
     
-    # Handle sorting
-    sort_by = request.GET.get('sort_by', 'default')  # default, rank, kakera
+    # Handle sorting (default, rank, kakera, keys)
+    sort_by = get_sort_by(request)
     
     # Get all characters from database for current user
-    if search_query:
-        all_characters = Character.objects.filter(
-            user=request.user,
-            name__icontains=search_query
-        )
-    else:
-        all_characters = Character.objects.filter(user=request.user)
-    
-    if sort_by == 'rank':
-        # Sort by rank (extract numeric value from the rank string like "#1,275")
-        # This requires a custom sorting using extra() or manual sorting
-        all_characters = all_characters.extra(
-            select={'rank_numeric': "CAST(REPLACE(REPLACE(rank, '#', ''), ',', '') AS INTEGER)"}
-        ).order_by('rank_numeric')
-    elif sort_by == 'kakera':
-        # Sort by value (kakera) in descending order, extracting numeric value
-        all_characters = all_characters.extra(
-            select={'kakera_value': "CAST(REPLACE(value, ' ka', '') AS INTEGER)"}
-        ).order_by('-kakera_value')
-    elif sort_by == 'keys':
-        # Sort by number of keys in descending order
-        all_characters = all_characters.order_by('-keys')
-    else:  # default order
-        all_characters = all_characters.order_by('sort_order')  # Order by JSON order
+    all_characters = character_queryset(request.user, search_query, sort_by)
     
-    # Paginate characters (10 per page)
-    paginator = Paginator(all_characters, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginate characters (10 per page); next/previous links seek by cursor
+    page_obj = paginate_characters(request, all_characters, sort_by, search_query)
     
-    # Prepare the page object with image URL availability check
-    for character in page_obj:
-        # Check if image is a valid URL (add a property to indicate if image is available)
-        if character.image and (character.image.startswith('http://') or character.image.startswith('https://')):
-            character.image_exists = True  # Assume URL-based images are available
-        else:
-            character.image_exists = bool(character.image)  # For backward compatibility
+    # Cards come from the fragment cache; only changed characters are rendered
+    attach_cards(page_obj)
     
     context = {
         'page_obj': page_obj,
         'sort_by': sort_by,
-        'total_characters': all_characters.count(),
+        'search_query': search_query,
+        'page_query': listing_query(search_query, sort_by),
+        'total_characters': page_obj.count,
+        'stats': collection_stats(request.user),
         'MEDIA_URL': settings.MEDIA_URL,
+        'import_result': import_result,
+        'error_message': error_message,
     }
     
-    # Add error message if there was one
-    if 'error_message' in locals() and error_message:
-        # Instead of displaying error as context (because it might get overwritten),
-        # we can add it to the context with a more specific approach
-        context['error_message'] = error_message
-    
-    return render(request, 'character_viewer/upload_and_view.html', context)
+    return render_list_page(request, 'character_viewer/upload_and_view.html', context)
 
 @login_required
+@cache_rendered_page
 def trade_list(request):
     # Handle search within the trade list
     search_query = request.GET.get('search', '')
     
-    # Handle sorting
-    sort_by = request.GET.get('sort_by', 'default')  # default, rank, kakera, keys
+    # Handle sorting (default, rank, kakera, keys)
+    sort_by = get_sort_by(request)
     
     # Get all characters that are in the trade list for current user
-    trade_characters = Character.objects.filter(user=request.user, in_trade_list=True)
+    trade_characters = character_queryset(request.user, search_query, sort_by, trade_only=True)
     
-    # Apply search filter if provided
-    if search_query:
-        trade_characters = trade_characters.filter(
-            name__icontains=search_query
-        )
+    # Paginate trade characters (10 per page); next/previous links seek by cursor
+    page_obj = paginate_characters(request, trade_characters, sort_by, search_query, trade_only=True)
     
-    # Handle sorting for trade list
-    if sort_by == 'rank':
-        # Sort by rank (extract numeric value from the rank string like "#1,275")
-        trade_characters = trade_characters.extra(
-            select={'rank_numeric': "CAST(REPLACE(REPLACE(rank, '#', ''), ',', '') AS INTEGER)"}
-        ).order_by('rank_numeric')
-    elif sort_by == 'kakera':
-        # Sort by value (kakera) in descending order, extracting numeric value
-        trade_characters = trade_characters.extra(
-            select={'kakera_value': "CAST(REPLACE(value, ' ka', '') AS INTEGER)"}
-        ).order_by('-kakera_value')
-    elif sort_by == 'keys':
-        # Sort by number of keys in descending order
-        trade_characters = trade_characters.order_by('-keys')
-    else:  # default order
-        trade_characters = trade_characters.order_by('sort_order')
-    
-    # Paginate trade characters (10 per page)
-    paginator = Paginator(trade_characters, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Prepare the page object with image URL availability check
-    for character in page_obj:
-        # Check if image is a valid URL (add a property to indicate if image is available)
-        if character.image and (character.image.startswith('http://') or character.image.startswith('https://')):
-            character.image_exists = True  # Assume URL-based images are available
-        else:
-            character.image_exists = bool(character.image)  # For backward compatibility
+    # Cards come from the fragment cache; only changed characters are rendered
+    attach_cards(page_obj, trade_page=True)
     
     context = {
         'page_obj': page_obj,
         'MEDIA_URL': settings.MEDIA_URL,
         'search_query': search_query,
+        'sort_by': sort_by,
+        'page_query': listing_query(search_query, sort_by),
+        'stats': collection_stats(request.user),
     }
     
-    return render(request, 'character_viewer/trade_list.html', context)
+    return render_list_page(request, 'character_viewer/trade_list.html', context)
 
 @csrf_exempt
 @login_required
 def toggle_trade_list(request):
     if request.method == 'POST':
         character_id = request.POST.get('character_id')
-        try:
-            character = Character.objects.get(id=character_id, user=request.user)
-            character.in_trade_list = not character.in_trade_list
-            character.save()
-            return JsonResponse({
-                'status': 'success',
-                'in_trade_list': character.in_trade_list,
-                'character_name': character.name
-            })
-        except Character.DoesNotExist:
+        characters = Character.objects.filter(id=character_id, user=request.user)
+        character = characters.only('name', 'kakera', 'in_trade_list').first()
+        if character is None:
             return JsonResponse({'status': 'error', 'message': 'Character not found'})
+        in_trade_list = not character.in_trade_list
+        with transaction.atomic():
+            # Only if the flag is still what was read; a concurrent toggle
+            # that got there first has already made the same change and
+            # counted it in the stats.
+            changed = characters.filter(in_trade_list=character.in_trade_list).update(in_trade_list=in_trade_list)
+            if changed:
+                sign = 1 if in_trade_list else -1
+                adjust_trade_stats(request.user, sign, sign * character.kakera)
+        if changed:
+            bump_collection_version(request.user)
+        return JsonResponse({
+            'status': 'success',
+            'in_trade_list': in_trade_list,
+            'character_name': character.name
+        })
     
     return JsonResponse({'status': 'error', 'message': 'Invalid request'})
 
 
+@login_required
+def batch_trade_list(request):
+    """
+    Apply one add/remove/toggle to many characters at once.
+
+    Takes a JSON body ``{"operation": ..., "character_ids": [...]}`` or
+    ``{"operation": ..., "filter": {"keys": 0}}``. For id batches the
+    response maps each id to its new trade-list state.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'}, status=405)
+    try:
+        # ValueError also covers a body that isn't UTF-8
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+    try:
+        if not isinstance(payload, dict):
+            raise TradeRequestError("Request body must be a JSON object")
+        character_ids = payload.get('character_ids')
+        updated = apply_trade_operation(request.user, payload.get('operation'),
+                                        character_ids=character_ids, filters=payload.get('filter'))
+    except TradeRequestError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    if updated:
+        refresh_trade_stats(request.user)
+        bump_collection_version(request.user)
+    response = {'status': 'success', 'updated': updated}
+    if character_ids is not None:
+        states = Character.objects.filter(user=request.user, id__in=character_ids).values_list('id', 'in_trade_list')
+        response['in_trade_list'] = {str(pk): in_trade_list for pk, in_trade_list in states}
+    return JsonResponse(response)
+
+
 @login_required
 def clear_all(request):
     """Delete all characters for the current user and reload the page."""
     if request.method == 'POST':
         # Delete all characters for the current user
         Character.objects.filter(user=request.user).delete()
+        # Forget the last upload so re-uploading the same file imports it again
+        Collection.objects.filter(user=request.user).update(upload_hash='')
+        clear_stats(request.user)
+        bump_collection_version(request.user)
         # Redirect back to the main page
         return HttpResponseRedirect(reverse('upload_and_view'))
     
@@ -217,7 +203,6 @@ def clear_all(request):
     return HttpResponseRedirect(reverse('upload_and_view'))
 
 
-from django.contrib.auth.hashers import make_password
 import os
 
 @csrf_protect
@@ -318,7 +303,6 @@ def temp_create_admin(request):
             return HttpResponse("Admin user already exists.")
     
     # Show a form to create admin with CSRF token
-    from django.template import Context, Template
     from django.template.context_processors import csrf
     
     # Get CSRF token
@@ -410,6 +394,8 @@ def remove_all_from_trade_list(request):
     if request.method == 'POST':
         # Set in_trade_list to False for all characters of the current user
         Character.objects.filter(user=request.user, in_trade_list=True).update(in_trade_list=False)
+        reset_trade_stats(request.user)
+        bump_collection_version(request.user)
         # Redirect back to the trade list page
         return HttpResponseRedirect(reverse('trade_list'))
     
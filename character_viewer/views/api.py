@@ -0,0 +1,107 @@
+"""
+Read-only JSON API over a user's characters, for bot integrations.
+
+Responses carry a strong ETag derived from the collection version and the
+query parameters, so a client that sends ``If-None-Match`` gets a 304 after
+a single version lookup, without any character rows being read.
+"""
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_http_methods
+
+from ..listing import character_queryset, get_sort_by, paginate_characters
+from ..versions import collection_version
+
+# Bump when the response shape changes, so old ETags stop matching.
+API_FORMAT = 1
+
+DEFAULT_PAGE_SIZE = 100
+
+API_FIELDS = (
+    'id', 'rank', 'rank_num', 'name', 'series', 'value', 'kakera', 'note',
+    'image', 'keys', 'key_type', 'in_trade_list', 'sort_order',
+)
+
+# Query parameters that select what a response contains.
+ETAG_PARAMS = ('search', 'sort_by', 'page', 'cursor', 'page_size')
+
+
+def max_page_size():
+    return getattr(settings, 'CHARACTER_API_MAX_PAGE_SIZE', 1000)
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    return min(max(page_size, 1), max_page_size())
+
+
+def collection_etag(view_name, user, version, params):
+    selected = '&'.join(f'{name}={params.get(name, "")}' for name in ETAG_PARAMS)
+    digest = hashlib.sha256(f'{API_FORMAT}:{view_name}:{user.pk}:{version}:{selected}'.encode('utf-8'))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    return '*' in candidates or etag in (c.removeprefix('W/') for c in candidates)
+
+
+def serialize_character(character):
+    return {field: getattr(character, field) for field in API_FIELDS}
+
+
+def _character_list(request, view_name, trade_only):
+    if not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Authentication required'}, status=401)
+
+    etag = collection_etag(view_name, request.user, collection_version(request.user), request.GET)
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        search_query = request.GET.get('search', '')
+        sort_by = get_sort_by(request)
+        queryset = character_queryset(request.user, search_query, sort_by, trade_only=trade_only)
+        page = paginate_characters(request, queryset.only(*API_FIELDS), sort_by, search_query,
+                                   trade_only=trade_only, per_page=get_page_size(request))
+        response = JsonResponse({
+            'status': 'success',
+            'count': page.count,
+            'page': page.number,
+            'num_pages': page.num_pages,
+            'page_size': page.per_page,
+            'sort_by': sort_by,
+            'search': search_query,
+            'next_cursor': page.next_cursor or None,
+            'previous_cursor': page.previous_cursor or None,
+            'characters': [serialize_character(character) for character in page],
+        })
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@require_http_methods(["GET"])
+def api_characters(request):
+    """
+    Paginated JSON view of the user's whole collection
+    """
+    return _character_list(request, 'characters', trade_only=False)
+
+
+@require_http_methods(["GET"])
+def api_trade_list(request):
+    """
+    Paginated JSON view of the user's trade list
+    """
+    return _character_list(request, 'trade_list', trade_only=True)
@@ -0,0 +1,51 @@
+"""
+Downloads of the collection and the trade list as CSV, JSON or $mm text.
+
+Responses stream: rows are fetched and encoded while the body is being
+sent (see ``character_viewer.export``). The current search and sort apply,
+so an export holds what the list shows, on every page.
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from ..export import EXPORT_FORMATS, encode_chunks, iter_export_characters
+from ..listing import SORT_ORDERINGS, character_queryset, get_sort_by
+
+
+def _export(request, export_format, name, trade_only):
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Unknown export format; expected one of {", ".join(EXPORT_FORMATS)}',
+        }, status=404)
+
+    content_type, writer = EXPORT_FORMATS[export_format]
+    sort_by = get_sort_by(request)
+    queryset = character_queryset(request.user, request.GET.get('search', ''), sort_by, trade_only=trade_only)
+    characters = iter_export_characters(queryset, SORT_ORDERINGS[sort_by])
+
+    response = StreamingHttpResponse(encode_chunks(writer(characters)), content_type=content_type)
+    filename = f'mudae-{name}-{timezone.localdate():%Y-%m-%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@login_required
+@require_http_methods(["GET"])
+def export_collection(request, export_format):
+    """
+    Download the user's collection
+    """
+    return _export(request, export_format, 'collection', trade_only=False)
+
+
+@login_required
+@require_http_methods(["GET"])
+def export_trade_list(request, export_format):
+    """
+    Download the user's trade list
+    """
+    return _export(request, export_format, 'trade-list', trade_only=True)
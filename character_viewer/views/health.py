@@ -1,12 +1,28 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 
+from mudae_project.cache import cache_stats
+from mudae_project.db import connection_stats
+
+from ..page_cache import page_cache_stats
+
 @require_http_methods(["GET"])
 def health_check(request):
     """
     Simple health check endpoint
+
+    Cache and database statistics are added for staff users, or for everyone
+    with HEALTH_CHECK_DETAILS = True.
     """
-    return JsonResponse({
+    response = {
         'status': 'ok',
-        'message': 'Application is running'
-    })
\ No newline at end of file
+        'message': 'Application is running',
+    }
+    if getattr(settings, 'HEALTH_CHECK_DETAILS', False) or request.user.is_staff:
+        response.update({
+            'page_cache': page_cache_stats(),
+            'cache': cache_stats(),
+            'database': connection_stats(),
+        })
+    return JsonResponse(response)
@@ -0,0 +1,33 @@
+"""
+Server-wide leaderboard page: the top collections by one metric, and where
+the viewer's own collection stands. See character_viewer.leaderboard.
+"""
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from ..leaderboard import METRICS, top_collections, user_rank
+
+METRIC_LABELS = {
+    'kakera': 'Total kakera',
+    'characters': 'Characters',
+    'keys': 'Keys',
+}
+
+
+@login_required
+@require_http_methods(["GET"])
+def leaderboard(request):
+    """
+    Top collections by kakera, characters or keys, plus the user's rank
+    """
+    metric = request.GET.get('by')
+    if metric not in METRICS:
+        metric = 'kakera'
+    return render(request, 'character_viewer/leaderboard.html', {
+        'metric': metric,
+        'metric_label': METRIC_LABELS[metric],
+        'metric_labels': METRIC_LABELS,
+        'entries': top_collections(metric),
+        'my_rank': user_rank(request.user, metric),
+    })
@@ -0,0 +1,23 @@
+import mimetypes
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_http_methods
+
+from ..zip_import import MEDIA_DIR, MEDIA_NAME_RE
+from .thumbnails import IMMUTABLE
+
+
+@require_http_methods(["GET"])
+def character_image(request, name):
+    """
+    Serve an image extracted from a zip upload
+    """
+    path = f'{MEDIA_DIR}/{name}'
+    if not MEDIA_NAME_RE.fullmatch(name) or not default_storage.exists(path):
+        raise Http404("No such image")
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    response = FileResponse(default_storage.open(path, 'rb'), content_type=content_type)
+    # Names are content hashes, so the bytes behind a URL never change
+    response['Cache-Control'] = IMMUTABLE
+    return response
@@ -0,0 +1,42 @@
+"""
+Card fragments of the character list, for live search and infinite scroll.
+
+The collection page fetches one page of rendered cards and the cursor for
+the next, instead of navigating to a whole new page, to show search results
+as the user types and to append rows as they scroll. Responses carry the
+same validators as the page itself, so an unchanged page is a 304.
+"""
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_http_methods
+
+from ..fragments import attach_cards
+from ..listing import character_queryset, get_sort_by, paginate_characters
+from ..page_cache import page_validators, set_validators
+
+
+@require_http_methods(["GET"])
+def character_rows(request):
+    """
+    One page of the user's character cards as HTML, with paging state
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Authentication required'}, status=401)
+
+    key, etag, last_modified = page_validators(request, 'character_rows')
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        search_query = request.GET.get('search', '')
+        sort_by = get_sort_by(request)
+        queryset = character_queryset(request.user, search_query, sort_by)
+        page_obj = paginate_characters(request, queryset, sort_by, search_query)
+        attach_cards(page_obj)
+        response = JsonResponse({
+            'status': 'success',
+            'html': ''.join(character.card_html for character in page_obj),
+            'rows': len(page_obj),
+            'count': page_obj.count,
+            'sort_by': sort_by,
+            'next_cursor': page_obj.next_cursor or None,
+        })
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,35 @@
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound
+from django.views.decorators.http import require_http_methods
+
+from ..thumbnails import ThumbnailError, get_thumbnail, source_url
+
+logger = logging.getLogger(__name__)
+
+# A token names one source URL and the thumbnail settings are part of the
+# cache key, so the bytes behind a URL never change.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Thumbnails are behind a login, so only the browser may keep them.
+PRIVATE_IMMUTABLE = 'private, max-age=31536000, immutable'
+
+
+@login_required
+@require_http_methods(["GET"])
+def thumbnail(request, token):
+    """
+    Serve the thumbnail for a signed character image URL
+    """
+    url = source_url(token)
+    if url is None:
+        return HttpResponseNotFound('Unknown image')
+    try:
+        path = get_thumbnail(url)
+    except ThumbnailError as e:
+        logger.warning("Thumbnail failed: %s", e)
+        return HttpResponse('Image unavailable', status=502, content_type='text/plain')
+
+    response = FileResponse(open(path, 'rb'), content_type='image/webp')
+    response['Cache-Control'] = PRIVATE_IMMUTABLE
+    return response
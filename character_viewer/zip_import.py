@@ -0,0 +1,174 @@
+"""
+Import of zip archives holding a ``data.json`` export plus its images.
+
+The archive is read member by member from the uploaded file, never as a
+whole. Images are hashed while they are copied out and stored in the media
+store under their SHA-256, so identical images (within an archive or across
+users) share one file; a pool of worker threads handles the copying.
+``data.json`` is streamed through the row validation first, so an invalid
+export stores no images, and then through the importer with each relative
+``image`` path rewritten to its stored name.
+
+Limits on member count and uncompressed size are checked against the
+archive's directory before anything is extracted, and again on the bytes
+actually read, so a zip bomb is rejected instead of filling the disk.
+"""
+import hashlib
+import logging
+import posixpath
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .importer import import_characters, normalize_character
+from .models import Collection
+from .parsers import iter_json_characters
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = 'data.json'
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+# Directory in the media store that images are extracted into, and the
+# names stored there: a two-character shard, then the SHA-256 and extension.
+MEDIA_DIR = 'characters'
+MEDIA_NAME_RE = re.compile(r'[0-9a-f]{2}/[0-9a-f]{64}\.(?:png|jpe?g|gif|webp)')
+
+# Zip-bomb limits.
+MAX_MEMBERS = 10000
+MAX_TOTAL_BYTES = 500 * 1024 * 1024
+MAX_MEMBER_BYTES = 20 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 200
+# Small members may compress well legitimately; only larger ones are ratio-checked.
+RATIO_CHECK_MIN_BYTES = 1024 * 1024
+
+CHUNK_SIZE = 64 * 1024
+IMAGE_WORKERS = 4
+
+
+class ZipImportError(ValueError):
+    """Raised when an archive is malformed or exceeds the zip-bomb limits."""
+
+
+def _member_path(name):
+    """Normalise a member name or image reference to a posix relative path."""
+    return posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+
+
+def check_limits(members, data_file):
+    """Reject archives whose directory exceeds the zip-bomb limits."""
+    if len(members) > MAX_MEMBERS:
+        raise ZipImportError(f"Archive has more than {MAX_MEMBERS} files")
+    total = 0
+    for info in members:
+        # data.json is streamed, so only the total bounds it
+        if info.file_size > MAX_MEMBER_BYTES and info is not data_file:
+            raise ZipImportError(f"{info.filename} is larger than {MAX_MEMBER_BYTES} bytes")
+        if info.file_size > RATIO_CHECK_MIN_BYTES and info.file_size > info.compress_size * MAX_COMPRESSION_RATIO:
+            raise ZipImportError(f"{info.filename} is compressed suspiciously well")
+        total += info.file_size
+    if total > MAX_TOTAL_BYTES:
+        raise ZipImportError(f"Archive expands to more than {MAX_TOTAL_BYTES} bytes")
+
+
+def find_data_file(members):
+    """The shallowest ``data.json`` member, or None."""
+    candidates = [info for info in members if posixpath.basename(_member_path(info.filename)) == DATA_FILE]
+    return min(candidates, key=lambda info: info.filename.count('/'), default=None)
+
+
+def iter_member_chunks(archive, info, limit):
+    """Yield a member's bytes in chunks, failing once more than ``limit`` are read."""
+    read = 0
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            read += len(chunk)
+            if read > limit:
+                raise ZipImportError(f"{info.filename} is larger than its declared size")
+            yield chunk
+
+
+def store_image(archive, info):
+    """Copy one image member into the media store; return its stored name."""
+    extension = posixpath.splitext(info.filename)[1].lower()
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in iter_member_chunks(archive, info, min(info.file_size, MAX_MEMBER_BYTES)):
+            digest.update(chunk)
+            tmp.write(chunk)
+        hexdigest = digest.hexdigest()
+        name = f'{MEDIA_DIR}/{hexdigest[:2]}/{hexdigest}{extension}'
+        if not default_storage.exists(name):
+            tmp.seek(0)
+            saved = default_storage.save(name, File(tmp))
+            if saved != name:
+                # Another worker or process stored the same bytes first; use theirs
+                default_storage.delete(saved)
+    return name
+
+
+def extract_images(archive, members, workers=IMAGE_WORKERS):
+    """Store every image member; return {member path: stored name}."""
+    images = [
+        info for info in members
+        if not info.is_dir() and posixpath.splitext(info.filename)[1].lower() in IMAGE_EXTENSIONS
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        names = list(pool.map(lambda info: store_image(archive, info), images))
+    return {_member_path(info.filename): name for info, name in zip(images, names)}
+
+
+def validate_data_file(archive, data_file):
+    """Parse and validate every row of ``data_file``, writing nothing."""
+    rows = iter_json_characters(iter_member_chunks(archive, data_file, data_file.file_size))
+    for position, row in enumerate(rows):
+        normalize_character(row, position)
+
+
+def _rewrite_images(rows, images, base_dir):
+    """Point each row's relative ``image`` at its extracted copy, if any."""
+    for row in rows:
+        image = row.get('image') if isinstance(row, dict) else None
+        if isinstance(image, str) and image and not image.startswith(('http://', 'https://')):
+            path = _member_path(image)
+            stored = images.get(posixpath.join(base_dir, path) if base_dir else path, images.get(path))
+            if stored:
+                row = {**row, 'image': stored}
+        yield row
+
+
+def import_zip(user, uploaded_file, content_hash=''):
+    """
+    Import a zip of ``data.json`` and images into ``user``'s collection.
+
+    Returns the importer's ImportResult. Raises ZipImportError for archives
+    that are not zips, lack ``data.json`` or exceed the limits; invalid rows
+    raise ImportValidationError as for a plain JSON upload.
+    """
+    if content_hash and Collection.objects.filter(user=user, upload_hash=content_hash).exists():
+        return import_characters(user, [], content_hash=content_hash)
+
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile:
+        raise ZipImportError("Not a valid zip file")
+    with archive:
+        members = archive.infolist()
+        data_file = find_data_file(members)
+        if data_file is None:
+            raise ZipImportError(f"Archive has no {DATA_FILE}")
+        check_limits(members, data_file)
+        validate_data_file(archive, data_file)
+
+        images = extract_images(archive, members)
+        logger.info("Extracted %d images from %s", len(images), uploaded_file.name)
+        base_dir = posixpath.dirname(_member_path(data_file.filename))
+        rows = iter_json_characters(iter_member_chunks(archive, data_file, data_file.file_size))
+        return import_characters(user, _rewrite_images(rows, images, base_dir), content_hash=content_hash)
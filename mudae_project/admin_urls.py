@@ -0,0 +1,13 @@
+"""
+Admin URLconf.
+
+With the cold-start boot mode the admin app is installed without
+autodiscovery, so it runs here, when the URLconf is first loaded: during
+``vercel_handler.warm_up()``, as the lambda initialises.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+app_name = 'admin'
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,73 @@
+"""
+Cache configuration for short-lived serverless workers.
+
+``cache_config()`` builds ``CACHES``: the ``default`` cache is a
+``TieredCache`` (a bounded in-process LRU) in front of a ``shared`` cache
+that outlives the process and is seen by every worker using it:
+
+- ``sqlite``: a SQLite file (``mudae_project.cache.sqlite``), shared by the
+  processes of one machine and kept across invocations of a reused lambda.
+- ``database``: Django's database cache, a table in the default database
+  (create it with ``python manage.py createcachetable``), shared by every
+  worker.
+
+This module is imported by the settings, so it must not import
+django.core.cache.
+"""
+import os
+import tempfile
+
+SHARED_TIERS = ('sqlite', 'database')
+
+# Table of the ``database`` shared tier.
+CACHE_TABLE = 'mudae_cache'
+
+# Entries kept in each process's LRU, and in the shared tier before culling.
+LOCAL_MAX_ENTRIES = 1000
+SHARED_MAX_ENTRIES = 20000
+
+# Seconds an entry is served from the LRU before the shared tier is asked again.
+LOCAL_TIMEOUT = 60
+
+
+def sqlite_cache_path():
+    return os.environ.get('CACHE_SQLITE_PATH') or os.path.join(tempfile.gettempdir(), 'mudae_cache.sqlite3')
+
+
+def cache_config(shared='sqlite', key_prefix=''):
+    """``CACHES`` with a two-tier ``default`` cache over the ``shared`` tier."""
+    if shared not in SHARED_TIERS:
+        raise ValueError(f'Unknown shared cache tier {shared!r}; expected one of {", ".join(SHARED_TIERS)}')
+
+    if shared == 'database':
+        shared_config = {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': CACHE_TABLE,
+        }
+    else:
+        shared_config = {
+            'BACKEND': 'mudae_project.cache.sqlite.SQLiteCache',
+            'LOCATION': sqlite_cache_path(),
+        }
+    shared_config['OPTIONS'] = {'MAX_ENTRIES': SHARED_MAX_ENTRIES}
+
+    return {
+        'default': {
+            'BACKEND': 'mudae_project.cache.tiered.TieredCache',
+            'LOCATION': 'shared',
+            'KEY_PREFIX': key_prefix,
+            'OPTIONS': {
+                'MAX_ENTRIES': LOCAL_MAX_ENTRIES,
+                'LOCAL_TIMEOUT': LOCAL_TIMEOUT,
+            },
+        },
+        'shared': shared_config,
+    }
+
+
+def cache_stats(alias='default'):
+    """Hit, miss and eviction counters for the ``alias`` cache, if it keeps them."""
+    from django.core.cache import caches
+
+    stats = getattr(caches[alias], 'stats', None)
+    return stats() if stats is not None else None
@@ -0,0 +1,179 @@
+"""
+Cache backend storing entries in a SQLite file.
+
+Meant as the shared tier on a single node: every worker process on the
+machine (and every invocation a reused lambda serves) sees the same file,
+which outlives the processes that wrote it. The database runs in WAL mode so
+readers never wait for a writer.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Seconds a statement waits on another process's write lock before failing.
+BUSY_TIMEOUT = 5
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+            self._local.connection = connection
+        return connection
+
+    def _write(self, key, value, timeout, replace):
+        expires = self.get_backend_timeout(timeout)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            written = replace or connection.execute(
+                'SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now)
+            ).fetchone() is None
+            if written:
+                self._cull(connection, now)
+                connection.execute(
+                    'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+                    (key, pickled, expires),
+                )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return written
+
+    def _cull(self, connection, now):
+        count = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count < self._max_entries:
+            return
+        connection.execute('DELETE FROM cache_entry WHERE expires <= ?', (now,))
+        count = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            connection.execute('DELETE FROM cache_entry')
+            return
+        # Entries closest to expiry (never-expiring ones last) go first
+        connection.execute(
+            'DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_entry '
+            'ORDER BY expires IS NULL, expires LIMIT ?)',
+            (count // self._cull_frequency,),
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(key, value, timeout, replace=False)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(key, value, timeout, replace=True)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), pickle.dumps(value, self.pickle_protocol), expires)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            self._cull(connection, time.time())
+            connection.executemany('INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return []
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        placeholders = ', '.join('?' * len(key_map))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache_entry WHERE key IN ({placeholders}) '
+            'AND (expires IS NULL OR expires > ?)',
+            (*key_map, time.time()),
+        )
+        return {key_map[key]: pickle.loads(value) for key, value in rows}
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?',
+                (pickle.dumps(value, self.pickle_protocol), key),
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # Keep the thread's connection open across requests, like CONN_MAX_AGE
+        pass
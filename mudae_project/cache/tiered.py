@@ -0,0 +1,286 @@
+"""
+Two-tier cache backend: a bounded in-process LRU in front of a shared cache.
+
+Reads try the process's own LRU first, then the shared tier (another
+configured cache alias, e.g. a database table or a SQLite file), copying
+shared hits into the LRU. Writes go through to both. Local entries live at
+most ``LOCAL_TIMEOUT`` seconds, which bounds how long a process can keep
+serving a value another process has since deleted or replaced.
+
+``get_or_set()`` protects misses from stampedes: within a process one thread
+per key computes the value while the others wait for it, and across
+processes a short lease in the shared tier lets one worker compute while the
+rest poll the shared tier for its result.
+
+If the shared tier fails, the error is logged and counted and the cache
+carries on as a local-only cache rather than failing the request.
+"""
+import logging
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+# Process-wide LRU stores, shared by the per-thread backend instances.
+_stores = {}
+_stores_lock = threading.Lock()
+
+# Number of in-process locks keys are striped over in get_or_set().
+FILL_LOCK_STRIPES = 64
+
+# Seconds between polls of the shared tier while another worker holds the lease.
+LEASE_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+class _LocalStore:
+    """An LRU of pickled values with per-entry expiry, plus the cache's counters."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.fill_locks = [threading.Lock() for _ in range(FILL_LOCK_STRIPES)]
+        self.stats = dict.fromkeys(
+            ('local_hits', 'shared_hits', 'misses', 'evictions', 'stampede_waits', 'shared_errors'), 0
+        )
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return _MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, expires, max_entries):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (expires, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, key):
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def fill_lock(self, key):
+        return self.fill_locks[zlib.crc32(key.encode('utf-8')) % FILL_LOCK_STRIPES]
+
+
+class TieredCache(BaseCache):
+    """
+    Cache whose ``LOCATION`` names the shared tier's alias in ``CACHES``.
+
+    OPTIONS: ``MAX_ENTRIES`` bounds the local LRU, ``LOCAL_TIMEOUT`` caps
+    the seconds an entry is served from it, and ``LOCK_TIMEOUT`` is how long
+    a get_or_set() lease may be held before another worker takes over.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        with _stores_lock:
+            self._store = _stores.setdefault(location, _LocalStore())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _shared_call(self, method, *args, default=None):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception:
+            logger.exception('Shared cache %r failed on %s()', self._shared_alias, method)
+            self._store.count('shared_errors')
+            return default
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _set_local(self, key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            self._store.delete(key)
+            return
+        local_timeout = self._local_timeout if timeout is None else min(timeout, self._local_timeout)
+        self._store.set(key, value, time.monotonic() + local_timeout, self._max_entries)
+
+    def _get(self, key, count=True):
+        value = self._store.get(key)
+        if value is not _MISSING:
+            if count:
+                self._store.count('local_hits')
+            return value
+        value = self._shared_call('get', key, _MISSING, default=_MISSING)
+        if value is _MISSING:
+            if count:
+                self._store.count('misses')
+            return _MISSING
+        if count:
+            self._store.count('shared_hits')
+        self._set_local(key, value, self._local_timeout)
+        return value
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._get(key)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        for key in key_map:
+            value = self._store.get(key)
+            if value is not _MISSING:
+                found[key] = value
+        self._store.count('local_hits', len(found))
+
+        missing = [key for key in key_map if key not in found]
+        if missing:
+            shared = self._shared_call('get_many', missing, default={})
+            for key, value in shared.items():
+                self._set_local(key, value, self._local_timeout)
+            self._store.count('shared_hits', len(shared))
+            self._store.count('misses', len(missing) - len(shared))
+            found.update(shared)
+        return {key_map[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        self._shared_call('set', key, value, timeout)
+        self._set_local(key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        made = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        self._shared_call('set_many', made, timeout)
+        for key, value in made.items():
+            self._set_local(key, value, timeout)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self._timeout(timeout)
+        added = self._shared_call('add', key, value, timeout, default=_MISSING)
+        if added is _MISSING:
+            # Shared tier unavailable: fall back to this process's view
+            added = self._store.get(key) is _MISSING
+        if added:
+            self._set_local(key, value, timeout)
+        return added
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+
+        with self._store.fill_lock(key):
+            # Another thread may have filled the key while this one waited
+            value = self._get(key, count=False)
+            if value is not _MISSING:
+                self._store.count('stampede_waits')
+                return value
+
+            lease = f'{key}:lease'
+            leased = self._shared_call('add', lease, 1, self._lock_timeout, default=True)
+            if not leased:
+                self._store.count('stampede_waits')
+                value = self._await_fill(key, lease)
+                if value is not _MISSING:
+                    return value
+            try:
+                value = default() if callable(default) else default
+                timeout = self._timeout(timeout)
+                self._shared_call('set', key, value, timeout)
+                self._set_local(key, value, timeout)
+            finally:
+                if leased:
+                    self._shared_call('delete', lease)
+            return value
+
+    def _await_fill(self, key, lease):
+        """Poll the shared tier for ``key`` until the lease holder stores it or gives up."""
+        deadline = time.monotonic() + self._lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LEASE_POLL_INTERVAL)
+            value = self._shared_call('get', key, _MISSING, default=_MISSING)
+            if value is not _MISSING:
+                self._set_local(key, value, self._local_timeout)
+                return value
+            if not self._shared_call('has_key', lease, default=False):
+                break
+        return _MISSING
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store.delete(key)
+        return self._shared_call('touch', key, self._timeout(timeout), default=False)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store.delete(key)
+        # Unlike the other operations a missing key is the caller's error,
+        # so the shared tier's ValueError is not swallowed
+        return self.shared.incr(key, delta)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        deleted_locally = self._store.delete(key)
+        return bool(self._shared_call('delete', key, default=False)) or deleted_locally
+
+    def delete_many(self, keys, version=None):
+        made = [self.make_and_validate_key(key, version=version) for key in keys]
+        for key in made:
+            self._store.delete(key)
+        self._shared_call('delete_many', made)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if self._store.get(key) is not _MISSING:
+            return True
+        return bool(self._shared_call('has_key', key, default=False))
+
+    def clear(self):
+        self._store.clear()
+        self._shared_call('clear')
+
+    def clear_local(self):
+        """Drop this process's LRU, leaving the shared tier intact."""
+        self._store.clear()
+
+    def close(self, **kwargs):
+        self._shared_call('close')
+
+    def stats(self):
+        with self._store.lock:
+            stats = dict(self._store.stats)
+            stats['local_entries'] = len(self._store.entries)
+        stats['max_entries'] = self._max_entries
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 3) if lookups else None
+        return stats
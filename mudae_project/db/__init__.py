@@ -0,0 +1,105 @@
+"""
+Database connection management for short-lived serverless workers.
+
+``database_config()`` builds the ``default`` database settings: persistent
+connections are health-checked before a request reuses them, and behind a
+transaction pooler (Supabase's port 6543) server-side cursors and prepared
+statements are turned off, since consecutive statements may run on different
+server connections.
+
+The ``mudae_project.db.postgresql`` and ``mudae_project.db.sqlite3`` engines
+wrap Django's own backends to count new connections, reuses and the time
+spent connecting, which the health check reports and ConnectionStatsMiddleware
+adds to each response.
+
+This module is imported by the settings, so it must not import django.db.
+"""
+import importlib.util
+import os
+import time
+from urllib.parse import urlparse
+
+# Port of Supabase's transaction-mode pooler.
+TRANSACTION_POOLER_PORT = 6543
+
+# Seconds a connection is kept between requests, per pool mode.
+CONN_MAX_AGE = {
+    'transaction': 300,
+    'session': 60,
+}
+
+# Django engines with an instrumented counterpart in this package.
+INSTRUMENTED_ENGINES = {
+    'django.db.backends.postgresql': 'mudae_project.db.postgresql',
+    'django.db.backends.sqlite3': 'mudae_project.db.sqlite3',
+}
+
+
+def pool_mode(url):
+    """``DATABASE_POOL_MODE`` if set, else guessed from the port in ``url``."""
+    mode = os.environ.get('DATABASE_POOL_MODE')
+    if mode:
+        return mode.lower()
+    return 'transaction' if urlparse(url).port == TRANSACTION_POOLER_PORT else 'session'
+
+
+def database_config(url, ssl_require=True):
+    """Settings for one database at ``url``, tuned for serverless workers."""
+    import dj_database_url
+
+    mode = pool_mode(url)
+    conn_max_age = int(os.environ.get('DB_CONN_MAX_AGE', CONN_MAX_AGE.get(mode, 0)))
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=conn_max_age,
+        conn_health_checks=conn_max_age > 0,
+        disable_server_side_cursors=mode == 'transaction',
+        ssl_require=ssl_require,
+    )
+    config['ENGINE'] = INSTRUMENTED_ENGINES.get(config['ENGINE'], config['ENGINE'])
+    # psycopg 3 prepares repeated queries server-side; psycopg2 never does
+    if mode == 'transaction' and config['ENGINE'] == INSTRUMENTED_ENGINES['django.db.backends.postgresql'] \
+            and importlib.util.find_spec('psycopg') is not None:
+        config.setdefault('OPTIONS', {})['prepare_threshold'] = None
+    return config
+
+
+class ConnectionStatsMixin:
+    """
+    Counts connects, reuses and handshake time on a DatabaseWrapper.
+
+    A reuse is a request whose first query found a connection left open by
+    an earlier request and passed the pre-reuse health check.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_stats = {
+            'connects': 0,
+            'reuses': 0,
+            'failed_health_checks': 0,
+            'handshake_ms': 0.0,
+        }
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        self.connection_stats['connects'] += 1
+        self.connection_stats['handshake_ms'] += (time.perf_counter() - started) * 1000
+
+    def close_if_health_check_failed(self):
+        checking = self.connection is not None and self.health_check_enabled and not self.health_check_done
+        super().close_if_health_check_failed()
+        if checking:
+            key = 'reuses' if self.connection is not None else 'failed_health_checks'
+            self.connection_stats[key] += 1
+
+
+def connection_stats(alias='default'):
+    """Connection counters for this thread's ``alias`` connection, if instrumented."""
+    from django.db import connections
+
+    stats = getattr(connections[alias], 'connection_stats', None)
+    if stats is None:
+        return None
+    return {**stats, 'handshake_ms': round(stats['handshake_ms'], 2)}
@@ -0,0 +1,29 @@
+"""
+Per-request database connection timing.
+"""
+from django.db import connection
+
+
+class ConnectionStatsMiddleware:
+    """
+    Add a ``Server-Timing`` entry with this request's connection handshake
+    time and whether it opened a new connection or reused one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = getattr(connection, 'connection_stats', None)
+        if stats is None:
+            return self.get_response(request)
+
+        before = dict(stats)
+        response = self.get_response(request)
+        connects = stats['connects'] - before['connects']
+        reuses = stats['reuses'] - before['reuses']
+        handshake_ms = stats['handshake_ms'] - before['handshake_ms']
+        entry = f'db-connect;dur={handshake_ms:.2f};desc="connects={connects} reuses={reuses}"'
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = f'{existing}, {entry}' if existing else entry
+        return response
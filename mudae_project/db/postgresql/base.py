@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from .. import ConnectionStatsMixin
+
+
+class DatabaseWrapper(ConnectionStatsMixin, base.DatabaseWrapper):
+    pass
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mudae_project.db.middleware.ConnectionStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -73,8 +74,15 @@ TEMPLATES = [
         'DIRS': [
             BASE_DIR / 'templates',  # Main templates directory
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process; the
+            # development server's autoreloader resets them on change
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -94,19 +102,15 @@ WSGI_APPLICATION = 'mudae_project.wsgi.application'
 # Check for database environment variables (for Vercel + Supabase)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'mudae_project.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
 # Check if running on production (Render, Vercel, etc.)
 if os.environ.get('DATABASE_URL'):
-    import dj_database_url
-    DATABASES['default'] = dj_database_url.parse(
-        os.environ.get('DATABASE_URL'),
-        conn_max_age=600,
-        ssl_require=True
-    )
+    from mudae_project.db import database_config
+    DATABASES['default'] = database_config(os.environ.get('DATABASE_URL'))
 elif 'VERCEL' in os.environ or 'RENDER_EXTERNAL_HOSTNAME' in os.environ:
     # Production settings for Vercel or Render
     import dj_database_url
@@ -117,6 +121,17 @@ elif 'VERCEL' in os.environ or 'RENDER_EXTERNAL_HOSTNAME' in os.environ:
     )
 
 
+# Cache: a per-process LRU in front of a shared tier that survives restarts.
+# CACHE_SHARED_TIER picks 'sqlite' (a file in the temp directory, the
+# default) or 'database' (needs `python manage.py createcachetable`).
+from mudae_project.cache import cache_config
+CACHES = cache_config(os.environ.get('CACHE_SHARED_TIER', 'sqlite'))
+
+# Identifies the deployed code; pages cached by browsers are revalidated
+# against it, so a deploy never leaves them pointing at old static files.
+RELEASE_ID = os.environ.get('VERCEL_GIT_COMMIT_SHA', '')[:12]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -155,16 +170,8 @@ STATIC_URL = '/static/'
 
 # Static files configuration for different environments
 if os.environ.get('VERCEL'):
-    # On Vercel, use a writable directory (/tmp)
+    # On Vercel, use a writable directory (/tmp); collectstatic creates it
     STATIC_ROOT = '/tmp/staticfiles'
-    # Ensure directory exists
-    import os
-    if not os.path.exists(STATIC_ROOT):
-        try:
-            os.makedirs(STATIC_ROOT, exist_ok=True)
-        except Exception:
-            # Fallback if we can't create the directory
-            STATIC_ROOT = '/tmp/static'
 else:
     # For local development and other platforms
     STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -175,25 +182,25 @@ static_dir = os.path.join(BASE_DIR, 'static')
 if os.path.exists(static_dir) and not os.environ.get('VERCEL'):
     STATICFILES_DIRS = [static_dir]
 
-# WhiteNoise configuration for serving static files in production
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise serves collected files under hashed names with immutable caching.
+# STATICFILES_STORAGE is ignored since Django 5.1; STORAGES replaces it.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'mudae_project.storage.StaticFilesStorage'},
+}
 
 # Media files (user uploads) - use temporary directory
-# In a serverless environment like Vercel, uploaded files are ephemeral
+# In a serverless environment like Vercel, uploaded files are ephemeral.
+# Settings stay free of filesystem side effects; whatever writes media
+# creates the directory when it first needs it.
+import tempfile
 if 'VERCEL' in os.environ:
     # On Vercel, use /tmp directory for temporary files
-    import tempfile
-    import os
     MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'mudae_media')
-    os.makedirs(MEDIA_ROOT, exist_ok=True)
-    MEDIA_URL = '/media/'
 else:
     # For local development, use a simple temporary directory
-    import tempfile
-    import os
     MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'mudae_media_local')
-    os.makedirs(MEDIA_ROOT, exist_ok=True)
-    MEDIA_URL = '/media/'
+MEDIA_URL = '/media/'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
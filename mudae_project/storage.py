@@ -0,0 +1,21 @@
+"""
+Static files storage.
+
+WhiteNoise's manifest storage serves ``collectstatic`` output under
+content-hashed names with a year-long immutable Cache-Control, plus gzip and
+Brotli copies of each file. Before ``collectstatic`` has run (tests, a fresh
+checkout) it would make ``{% static %}`` raise, so names missing from the
+manifest fall back to their unhashed form instead.
+"""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Neither in the manifest nor collected into STATIC_ROOT
+            return name
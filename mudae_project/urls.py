@@ -1,4 +1,3 @@
-from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
@@ -8,7 +7,7 @@ from character_viewer.views import custom_logout
 from character_viewer.views.health import health_check
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('admin/', include('mudae_project.admin_urls')),
     path('', include('character_viewer.urls')),
     path('accounts/login/', auth_views.LoginView.as_view(), name='login'),
     path('accounts/logout/', custom_logout, name='logout'),
@@ -4,7 +4,9 @@ Production settings for Vercel deployment with Supabase
 from .settings import *
 
 import os
-import dj_database_url
+
+from .cache import cache_config
+from .db import database_config
 
 # Force DEBUG to False in production
 DEBUG = False
@@ -13,46 +15,63 @@ DEBUG = False
 ALLOWED_HOSTS = ['*']
 
 # Database configuration for Supabase
+# Connections are health-checked before reuse; behind Supabase's transaction
+# pooler (port 6543, or DATABASE_POOL_MODE=transaction) server-side cursors
+# and prepared statements are disabled. See mudae_project/db.
 if os.environ.get('DATABASE_URL'):
     DATABASES = {
-        'default': dj_database_url.parse(
-            os.environ.get('DATABASE_URL'),
-            conn_max_age=600,
-            ssl_require=True
-        )
+        'default': database_config(os.environ.get('DATABASE_URL'))
     }
 else:
     # Fallback to default configuration if no DATABASE_URL
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'mudae_project.db.sqlite3',
             'NAME': '/tmp/db.sqlite3',
         }
     }
 
+# Cache: each lambda's LRU sits in front of the database cache table, shared
+# by every lambda, or without a database URL a SQLite file in /tmp that a
+# reused lambda keeps. Keys are prefixed with the deployed commit so cached
+# pages and cards never outlive the templates and static files they refer to.
+CACHES = cache_config(
+    os.environ.get('CACHE_SHARED_TIER', 'database' if os.environ.get('DATABASE_URL') else 'sqlite'),
+    key_prefix=RELEASE_ID,
+)
+
 # Static files for production
 STATIC_URL = '/static/'
-# On Vercel, use /tmp directory which is writable
-STATIC_ROOT = '/tmp/staticfiles'
-
-# Ensure static root directory exists
-if not os.path.exists(STATIC_ROOT):
-    try:
-        os.makedirs(STATIC_ROOT, exist_ok=True)
-    except Exception:
-        # If we can't create the directory, use a fallback
-        STATIC_ROOT = '/tmp/static'
+# Collected before deploying (see vercel.json's includeFiles) and shipped
+# with the function; WhiteNoise only reads it. Collecting at boot would
+# compress every file on each cold start.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# A deploy without collected files still serves the app's own assets,
+# unhashed and with short-lived caching
+WHITENOISE_USE_FINDERS = True
 
 # Media files - use temporary directory
 # In a serverless environment like Vercel, uploaded files are ephemeral
 import tempfile
-import os
 MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'mudae_media')
-os.makedirs(MEDIA_ROOT, exist_ok=True)
 MEDIA_URL = '/media/'
 
-# Use WhiteNoise for static file serving
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Cold-start boot mode: trim import-time work and warm templates and the
+# URL resolver when the lambda initialises rather than on the first request.
+COLD_START_BOOT = os.environ.get('COLD_START_BOOT', 'true').lower() == 'true'
+
+if COLD_START_BOOT:
+    # Skip admin autodiscovery at setup; the admin URLconf runs it on first use
+    INSTALLED_APPS = [
+        'django.contrib.admin.apps.SimpleAdminConfig' if app == 'django.contrib.admin' else app
+        for app in INSTALLED_APPS
+    ]
+
+# Use WhiteNoise for static file serving, under hashed names
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'mudae_project.storage.StaticFilesStorage'},
+}
 
 # Security settings for production
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
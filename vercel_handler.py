@@ -1,10 +1,17 @@
 """
 Vercel handler for Django applications
 """
+import base64
+import gzip
 import os
 import sys
 from io import BytesIO
 
+try:
+    import brotli
+except ImportError:  # optional; responses fall back to gzip
+    brotli = None
+
 # Add project directory to Python path
 project_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_dir)
@@ -12,6 +19,21 @@ sys.path.insert(0, project_dir)
 # Global application instance
 _application = None
 
+# Bodies smaller than this go back uncompressed; the saving is not worth it.
+COMPRESS_MIN_BYTES = 1024
+
+# Templates compiled at boot in cold-start mode, so no request pays for it.
+WARM_TEMPLATES = (
+    'character_viewer/upload_and_view.html',
+    'character_viewer/trade_list.html',
+    'character_viewer/_character_card.html',
+    'character_viewer/_pagination.html',
+    'registration/login.html',
+)
+
+# Content types that are valid UTF-8 text and worth compressing.
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
 def get_application():
     """Get or create the Django WSGI application."""
     global _application
@@ -28,9 +50,24 @@ def get_application():
         
         # Get the WSGI application
         _application = get_wsgi_application()
+        
+        from django.conf import settings
+        if getattr(settings, 'COLD_START_BOOT', False):
+            warm_up()
     
     return _application
 
+def warm_up():
+    """Load the URLconf and views and compile templates before the first request."""
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+    
+    # Imports the URLconf (and every view module) and builds the reverse map
+    get_resolver().reverse_dict
+    # With the cached loader, compiled templates are kept for later requests
+    for template_name in WARM_TEMPLATES:
+        get_template(template_name)
+
 def create_wsgi_environ(event):
     """Create WSGI environ dict from Vercel event."""
     # Extract request details
@@ -88,6 +125,77 @@ def create_wsgi_environ(event):
     
     return environ
 
+def is_text_type(content_type):
+    """Whether a Content-Type names a UTF-8 text body."""
+    return content_type.split(';')[0].strip().lower().startswith(TEXT_CONTENT_TYPES)
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, or None."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress_body(body, coding):
+    if coding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def encode_response_body(body, headers, accept_encoding):
+    """
+    Turn a response body into Vercel's (body, isBase64Encoded) pair.
+
+    Text bodies at least COMPRESS_MIN_BYTES long are compressed when the
+    client accepts it, updating ``headers`` in place. Compressed and other
+    binary bodies are base64-encoded; plain text is passed through as str.
+    """
+    content_type = headers.get('Content-Type', '')
+    if is_text_type(content_type) and 'Content-Encoding' not in headers and len(body) >= COMPRESS_MIN_BYTES:
+        coding = negotiate_encoding(accept_encoding)
+        if coding:
+            body = compress_body(body, coding)
+            headers['Content-Encoding'] = coding
+            headers['Content-Length'] = str(len(body))
+            vary = headers.get('Vary')
+            headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+    if is_text_type(content_type) and 'Content-Encoding' not in headers:
+        try:
+            return body.decode('utf-8'), False
+        except UnicodeDecodeError:
+            pass
+    return base64.b64encode(body).decode('ascii'), True
+
+
+def read_body(result):
+    """Collect a WSGI response iterable without copying single-chunk bodies."""
+    try:
+        chunks = list(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    if len(chunks) == 1:
+        return bytes(chunks[0])
+    return b''.join(chunks)
+
+
 def handler(event, context):
     """
     Vercel handler function for Django application
@@ -112,7 +220,7 @@ def handler(event, context):
         # Execute Django application
         try:
             result = application(environ, start_response)
-            body = b''.join(result)
+            body = read_body(result)
         except Exception as e:
             # Handle Django exceptions
             import traceback
@@ -142,11 +250,16 @@ def handler(event, context):
         if 'Content-Type' not in headers_dict:
             headers_dict['Content-Type'] = 'text/html'
         
+        # Compress if the client allows it, base64-encode anything binary
+        accept_encoding = environ.get('HTTP_ACCEPT_ENCODING', '')
+        body, is_base64 = encode_response_body(body, headers_dict, accept_encoding)
+        
         # Return response
         return {
             'statusCode': status_code,
             'headers': headers_dict,
-            'body': body.decode('utf-8', errors='replace') if isinstance(body, bytes) else str(body),
+            'body': body,
+            'isBase64Encoded': is_base64,
         }
         
     except Exception as e: